@@ -1,7 +1,10 @@
 import importlib
-from datetime import timedelta
+import multiprocessing
 import random
-from typing import Union
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from typing import Callable, Union
 
 from loguru import logger
 
@@ -10,20 +13,89 @@ from c4_sign.lib.canvas import Canvas
 from c4_sign.loading_manager import LoadingManager
 
 
+class TaskEntry:
+    """
+    A screen task in the rotation.
+
+    Only the class (and so its name, title and artist) is known up front; the task itself,
+    along with any assets it downloads or renders in its constructor, is created the first
+    time it's needed, or ahead of time on a background thread by warm_up().
+    """
+
+    def __init__(self, task_class: type[ScreenTask], create: Callable[[type[ScreenTask]], ScreenTask]):
+        self.task_class = task_class
+        self.instance = None
+        self.failed = False
+        self.__create = create
+        self.__lock = threading.Lock()
+        self.__warm_up_thread = None
+
+    @property
+    def name(self) -> str:
+        return self.task_class.__name__
+
+    @property
+    def title(self) -> str:
+        return self.task_class.title
+
+    @property
+    def artist(self) -> str:
+        return self.task_class.artist
+
+    @property
+    def loaded(self) -> bool:
+        return self.instance is not None or self.failed
+
+    def get(self) -> Union[ScreenTask, None]:
+        """
+        Returns the task, creating it if needed (or waiting for warm_up to finish).
+
+        Returns None if the task couldn't be created.
+        """
+        with self.__lock:
+            if not self.loaded:
+                logger.debug("Creating screen task: {}", self.name)
+                try:
+                    self.instance = self.__create(self.task_class)
+                except Exception as e:
+                    logger.error("Caught exception while creating screen task {}!", self.name)
+                    logger.exception(e)
+                    self.failed = True
+                else:
+                    logger.debug("Screen Task {} created!", self.name)
+            return self.instance
+
+    def warm_up(self):
+        """
+        Starts creating the task on a background thread, so it's ready by the time the rotation gets to it.
+        """
+        if self.loaded or self.__warm_up_thread is not None:
+            return
+        logger.debug("Warming up screen task: {}", self.name)
+        self.__warm_up_thread = threading.Thread(target=self.get, name=f"WarmUp-{self.name}", daemon=True)
+        self.__warm_up_thread.start()
+
+
 class ScreenManager:
-    def __init__(self, make_histograms):
-        self.tasks = []
+    def __init__(self, make_histograms, warm_up=True, optimize=True):
+        self.tasks: list[TaskEntry] = []
         self.current_task = None
         self.index = 0
         self.make_histograms = make_histograms
-
-    @property
-    def current_tasks(self) -> list[ScreenTask]:
-        return self.tasks
+        # create the next task in line in the background while the current one runs
+        self.warm_up = warm_up
+        self.loading_manager = None
+        # render the frames of OptimScreenTasks in the background, as soon as the tasks are found
+        self.optimize = optimize
+        # the OptimScreenTask classes whose frames are being rendered in the background
+        self.optimizing = {}
+        self.__optimize_pool = None
+        self.__optimize_lock = threading.Lock()
 
     def update_tasks(self, loading_manager: Union[None, LoadingManager] = None):
         # import all files in screen_tasks
         logger.info("Updating screen tasks")
+        self.loading_manager = loading_manager
         mod = importlib.import_module("c4_sign.screen_tasks")
         for obj in mod.__all__:
             obj = importlib.import_module(f"c4_sign.screen_tasks.{obj}")
@@ -35,27 +107,75 @@ class ScreenManager:
                     and obj.ignore is False
                 ):
                     logger.debug("Adding screen task: {}", obj.__name__)
-                    if loading_manager:
-                        with loading_manager(obj.__name__):
-                            instance = obj()
-                            instance.set_make_histogram(self.make_histograms)
-                            self.tasks.append(instance)
-                    else:
-                        instance = obj()
-                        instance.set_make_histogram(self.make_histograms)
-                        self.tasks.append(instance)
-                    logger.debug("Screen Task {} added!", obj.__name__)
+                    self.tasks.append(TaskEntry(obj, self.__create_task))
         # now, shuffle the tasks with an arbitrary seed (so that it's the same between simulator and real)
         rand = random.Random(0xd883ff)
         rand.shuffle(self.tasks)
         logger.info("Screen Tasks updated!")
+        if self.optimize:
+            self.__start_optimizing()
+
+    def __start_optimizing(self):
+        """
+        Starts rendering the frames of every OptimScreenTask that needs it, several at once, in a pool of processes.
+
+        The tasks themselves aren't created for this; each render makes its own in its process.
+        """
+        with self.__optimize_lock:
+            for entry in self.tasks:
+                task_class = entry.task_class
+                if not issubclass(task_class, OptimScreenTask) or task_class in self.optimizing.values():
+                    continue
+                if not task_class.needs_rendering():
+                    continue
+                if self.__optimize_pool is None:
+                    self.__optimize_pool = ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn"))
+                logger.info("Optimizing {} in the background", entry.name)
+                self.optimizing[self.__optimize_pool.submit(task_class.render_frame_cache)] = task_class
+
+    def __create_task(self, task_class: type[ScreenTask]) -> ScreenTask:
+        if issubclass(task_class, OptimScreenTask):
+            instance = task_class(optimize=False)
+            if task_class.should_optimize and not instance.load_optimized():
+                # still being rendered in the background (or the render failed); stay out of rotation until it's done
+                instance.being_optimized = True
+        else:
+            instance = task_class()
+        instance.set_make_histogram(self.make_histograms)
+        return instance
+
+    def check_optimizing(self):
+        """
+        Lets any OptimScreenTasks that have finished rendering into rotation.
+        """
+        with self.__optimize_lock:
+            for future in [future for future in self.optimizing if future.done()]:
+                task_class = self.optimizing.pop(future)
+                if future.exception() is not None:
+                    # it stays "being optimized", and so out of rotation
+                    logger.opt(exception=future.exception()).error("Failed to optimize {}", task_class.__name__)
+                    continue
+                logger.info("Task {} optimized, adding it to the rotation", task_class.__name__)
+                # tasks that haven't been created yet load their frames when they are
+                for entry in self.tasks:
+                    if entry.task_class is task_class and entry.instance is not None:
+                        entry.instance.load_optimized()
+            if not self.optimizing and self.__optimize_pool is not None:
+                self.__optimize_pool.shutdown(wait=False)
+                self.__optimize_pool = None
+
+    def __get_task(self, entry: TaskEntry) -> Union[ScreenTask, None]:
+        if entry.loaded or not self.loading_manager:
+            return entry.get()
+        with self.loading_manager(entry.name):
+            return entry.get()
 
     def override_current_task(self, task: Union[str, ScreenTask]):
         # if task is a string, find the task by name
         if isinstance(task, str):
-            for t in self.tasks:
-                if t.__class__.__name__ == task:
-                    task = t
+            for entry in self.tasks:
+                if entry.name == task and entry.get() is not None:
+                    task = entry.get()
                     break
             else:
                 # task not found!
@@ -68,24 +188,46 @@ class ScreenManager:
         self.current_task.prepare()
         self.index = -1
 
-    def draw(self, canvas: Canvas, delta_time: timedelta):
-        if not self.current_task:
-            logger.debug("No current task!")
-            if self.index >= len(self.current_tasks):
+    def __start_next_task(self) -> bool:
+        """
+        Starts the next task in the rotation that's ready, skipping over any that aren't.
+
+        A task that hasn't been created yet is left to warm up in the background (and comes back around
+        later) instead of being waited for, as long as some other task has already been created.
+
+        Returns False if none of the tasks could be started.
+        """
+        for _ in range(len(self.tasks)):
+            if self.index >= len(self.tasks):
                 logger.debug("Looping back to the start!")
                 self.index = 0
-            self.current_task = self.current_tasks[self.index]
-            logger.debug("Trying to start task: {}", self.current_task.__class__.__name__)
-            if not self.current_task.prepare():
+            entry = self.tasks[self.index]
+            if self.warm_up:
+                # get the one after it going, whether or not this one starts
+                self.tasks[(self.index + 1) % len(self.tasks)].warm_up()
+            logger.debug("Trying to start task: {}", entry.name)
+            if self.warm_up and not entry.loaded and any(other.instance is not None for other in self.tasks):
+                entry.warm_up()
+                logger.debug("Task {} is still warming up, skipping!", entry.name)
+            else:
+                task = self.__get_task(entry)
+                if task is not None and task.prepare():
+                    logger.debug("Task {} ready!", entry.name)
+                    self.current_task = task
+                    return True
                 # uh... we don't want to do anything!
                 # so let's just skip this task!
-                logger.debug("Task {} not ready, skipping!", self.current_task)
-                self.current_task = None
-                self.index += 1
-                if self.index >= len(self.current_tasks):
-                    self.index = 0
-                return self.draw(canvas, delta_time)
-            logger.debug("Task {} ready!", self.current_task.__class__.__name__)
+                logger.debug("Task {} not ready, skipping!", entry.name)
+            self.index += 1
+        return False
+
+    def draw(self, canvas: Canvas, delta_time: timedelta):
+        if not self.current_task:
+            logger.debug("No current task!")
+            self.check_optimizing()
+            if not self.__start_next_task():
+                # nothing's ready to go; try again next frame
+                return False
         if self.current_task.draw(canvas, delta_time):
             logger.debug("Task {} finished!", self.current_task.__class__.__name__)
             self.current_task = None
@@ -1,5 +1,6 @@
 import argparse
 
+from c4_sign.lib.pacer import FramePacer
 from c4_sign.screen import init_matrix, update_screen
 from c4_sign.ScreenManager import ScreenManager
 from c4_sign.log import setup_logger
@@ -9,99 +10,48 @@ import sys
 
 
 def run_gif():
-    from datetime import timedelta
     from pathlib import Path
 
-    from PIL import Image, ImageDraw, ImageFont
+    from c4_sign.preview import render_previews
 
-    from c4_sign.lib.canvas import Canvas
-
-    try:
-        from rich.progress import track
-    except ImportError:
-
-        def track(iter, description=""):
-            yield from iter
-
-    screen_manager = ScreenManager()
+    screen_manager = ScreenManager(False, warm_up=False, optimize=False)
     screen_manager.update_tasks()
-    delta_t = timedelta(seconds=1 / 24)
-    canvas = Canvas()
-    tasks = screen_manager.current_tasks
-    font = ImageFont.truetype("Courier", 16)
+    # only the classes are needed here; each task is created in the process that renders it
+    tasks = sorted(screen_manager.tasks, key=lambda x: x.name)
     with open("docs/screen_tasks.md", "w") as f:
         f.write("# Screen Tasks\n\n")
-        for task in sorted(tasks, key=lambda x: x.__class__.__name__):
-            f.write(f"## {task.__class__.__name__}\n")
+        for task in tasks:
+            f.write(f"## {task.name}\n")
             f.write(f"**Title**: {task.title}\n\n")
             f.write(f"**Artist**: {task.artist}\n\n")
-            if task.__doc__:
-                f.write(f"Description:\n```python\n{task.__doc__}\n```\n")
-            f.write(f"![{task.__class__.__name__}](images/screen_tasks/{task.__class__.__name__}.webp)\n")
+            if task.task_class.__doc__:
+                f.write(f"Description:\n```python\n{task.task_class.__doc__}\n```\n")
+            f.write(f"![{task.name}](images/screen_tasks/{task.name}.webp)\n")
     source = Path("docs/images/screen_tasks")
     source.mkdir(parents=True, exist_ok=True)
     existing = [x.stem for x in source.glob("*.webp")]
-    removed = [x for x in existing if x not in [task.__class__.__name__ for task in tasks]]
+    removed = [x for x in existing if x not in [task.name for task in tasks]]
     for remove in removed:
         print(f"Removing {remove}.webp")
         (source / f"{remove}.webp").unlink()
-    tasks = [task for task in tasks if task.__class__.__name__ not in existing]
-    for task in track(tasks, description="Converting!"):
-        print(f"Running {task.__class__.__name__}")
-        duration = 0
-        images = []
-        task.prepare()
-        while True:
-            canvas.clear()
-            text = task.get_lcd_text()
-            result = task.draw(canvas, delta_t)
-            img = Image.new("RGB", (256, 384))
-            draw = ImageDraw.Draw(img)
-            for y in range(32):
-                for x in range(32):
-                    r, g, b = canvas.get_pixel(x, y)
-                    draw.rectangle((x * 8, y * 8, (x + 1) * 8, (y + 1) * 8), fill=(r, g, b))
-            # add text
-            draw.text((0, 320), text[16:], font=font, fill=(255, 255, 255))
-            draw.text((0, 300), text[:16], font=font, fill=(255, 255, 255))
-            images.append(img)
-            duration += 1 / 24
-            if result or duration > 30:
-                break
-        images[0].save(
-            source / f"{task.__class__.__name__}.webp",
-            save_all=True,
-            append_images=images[1:],
-            duration=(1 / 24) * 1000,
-            loop=0,
-        )
+    tasks = [task.task_class for task in tasks if task.name not in existing]
+    failed = render_previews(tasks, source, "Courier")
+    if failed:
+        logger.error("Failed to render previews of: {}", ", ".join(failed))
+        exit(1)
 
     exit(0)
 
 def generate_pr_preview():
-    from datetime import timedelta
     from pathlib import Path
 
-    from PIL import Image, ImageDraw, ImageFont
-
-    from c4_sign.lib.canvas import Canvas
     from subprocess import run
     import importlib
     from c4_sign.base_task import ScreenTask, OptimScreenTask
-
-    try:
-        from rich.progress import track
-    except ImportError:
-
-        def track(iter, description=""):
-            yield from iter
+    from c4_sign.preview import render_previews
 
     logger.info("Generating PR preview!")
-    delta_t = timedelta(seconds=1 / 24)
-    canvas = Canvas()
-    font = ImageFont.truetype("./Source_Code_Pro/source-code-pro-v23-latin-regular.ttf", 16)
     source = Path("preview")
-    source.mkdir(parents=True, exist_ok=True)
     # git diff --name-only -r HEAD^1 HEAD
     changed_files = run(["git", "diff", "--name-only", "-r", "HEAD^1", "HEAD"], capture_output=True, text=True).stdout.splitlines()
     # anything in c4_sign/screen_tasks/*.py we wanna generate
@@ -118,40 +68,11 @@ def generate_pr_preview():
                     and obj not in (ScreenTask, OptimScreenTask)
                     and obj.ignore is False
                 ):
-                    if issubclass(obj, OptimScreenTask):
-                        obj.should_optimize = False
-                    tasks.append(obj())
-    for task in track(tasks, description="Converting!"):
-        logger.info("Running {}", task.__class__.__name__)
-        print(f"Running {task.__class__.__name__}")
-        duration = 0
-        images = []
-        task.prepare()
-        while True:
-            canvas.clear()
-            text = task.get_lcd_text()
-            result = task.draw(canvas, delta_t)
-            img = Image.new("RGB", (256, 384))
-            draw = ImageDraw.Draw(img)
-            for y in range(32):
-                for x in range(32):
-                    r, g, b = canvas.get_pixel(x, y)
-                    draw.rectangle((x * 8, y * 8, (x + 1) * 8, (y + 1) * 8), fill=(r, g, b))
-            # add text
-            draw.text((0, 320), text[16:], font=font, fill=(255, 255, 255))
-            draw.text((0, 300), text[:16], font=font, fill=(255, 255, 255))
-            images.append(img)
-            duration += 1 / 24
-            if result or duration > 30:
-                break
-        logger.info("Saving {}", task.__class__.__name__)
-        images[0].save(
-            source / f"{task.__class__.__name__}.webp",
-            save_all=True,
-            append_images=images[1:],
-            duration=(1 / 24) * 1000,
-            loop=0,
-        )
+                    tasks.append(obj)
+    failed = render_previews(tasks, source, "./Source_Code_Pro/source-code-pro-v23-latin-regular.ttf")
+    if failed:
+        logger.error("Failed to render PR previews of: {}", ", ".join(failed))
+        exit(1)
     logger.info("Processed all PR preview tasks")
 
     exit(0)
@@ -167,6 +88,10 @@ def main(args=None):
         print("Cache purged!")
     if args.generate_pr_preview:
         return generate_pr_preview()
+    if args.bench is not None:
+        from c4_sign.bench import run_bench
+
+        exit(run_bench(args.bench, args.bench_frames, args.json))
     if args.gif:
         logger.info("Starting in GIF mode")
         print("GIF mode!")
@@ -180,7 +105,7 @@ def main(args=None):
             rmtree(source, ignore_errors=True)
             logger.info("GIF folder purged!")
         return run_gif()
-    init_matrix(args.simulator, args.histograms)
+    init_matrix(args.simulator, args.histograms, args.fps, args.late_frames, args.keep_alive)
     tm = TaskManager()
 
     logger.info("Finishing startup; starting main loop!")
@@ -196,8 +121,27 @@ if __name__ == "__main__":
     parser.add_argument("--gif", action="store_true")
     parser.add_argument("--profile", action="store_true")
     parser.add_argument("--histograms", action="store_true")
+    parser.add_argument("--fps", type=float, default=24, help="target frame rate")
+    parser.add_argument(
+        "--late-frames",
+        choices=FramePacer.POLICIES,
+        default=FramePacer.DROP,
+        help="drop the frames a slow frame ran into, or catch up on them without sleeping",
+    )
+    parser.add_argument(
+        "--keep-alive",
+        type=float,
+        default=1,
+        metavar="SECONDS",
+        help="resend an unchanged frame to the display this often",
+    )
     parser.add_argument("--purge-cache", action="store_true")
     parser.add_argument("--generate-pr-preview", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument(
+        "--bench", nargs="*", metavar="TASK", help="benchmark these screen tasks (or all of them) without a screen"
+    )
+    parser.add_argument("--bench-frames", type=int, default=240, help="how many frames to benchmark each task for")
+    parser.add_argument("--json", action="store_true", help="print the benchmark results as JSON")
     args = parser.parse_args()
     if args.profile:
         try:
@@ -231,6 +175,9 @@ if __name__ == "__main__":
             tarball = "c4_histograms.tar.gz"
             temp_path = tempfile.gettempdir()
 
+            # the sign only saves the numbers; draw the charts now, in their own process
+            subprocess.run([sys.executable, "-m", "c4_sign.histograms", str(Path(temp_path) / directory)])
+
             proc = subprocess.run(["tar", "-C", temp_path, "-czf", f"{Path(temp_path) / tarball}", directory])
             if proc.returncode != 0:
                 print(f"Failed to tar histograms directory at {Path(temp_path) / directory}")
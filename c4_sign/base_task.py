@@ -1,13 +1,15 @@
-import shutil
 from datetime import timedelta
+from pathlib import Path
+from time import perf_counter
 
 import arrow
 from loguru import logger
 
 from c4_sign.consts import FONT_PICO
-from c4_sign.lib import graphics
-from c4_sign.lib.assets import cache_path
+from c4_sign.lib.cache import cache_path
 from c4_sign.lib.canvas import Canvas
+from c4_sign.lib.frames import FrameWriter, read_frames
+from c4_sign.lib.telemetry import HISTOGRAM_PATH, TimeHistogram, save_draw_times
 
 
 class RepeatingTask:
@@ -87,7 +89,8 @@ class ScreenTask:
             max_run_time = suggested_run_time
         self.max_run_time = max_run_time
         self.make_histogram = False
-        self.draw_time_samples = []
+        # how long draw_frame takes, always recorded (it's cheap), and saved for a chart with --histograms
+        self.draw_times = TimeHistogram()
 
     def set_suggested_run_time(self, suggested_run_time):
         self.suggested_run_time = suggested_run_time
@@ -111,8 +114,7 @@ class ScreenTask:
         # do any setup here!
         self.started = arrow.now()
         self.elapsed_time = timedelta()
-        
-        self.draw_time_samples = []
+        self.draw_times.reset()
 
         # return True if we WANT to do anything!
         # this is useful for, say, critical weather updates
@@ -125,57 +127,38 @@ class ScreenTask:
 
     def teardown(self, forced=False):
         # do any cleanup here!
-        if self.make_histogram:
-            from matplotlib import pyplot as plt
-            import tempfile
-            from pathlib import Path
-            import os
-            import math
-
-            plt.style.use("fivethirtyeight")
-
-            plt.suptitle("Draw time frequency for '" + self.title + "' by " + self.artist, wrap=True)
-            plt.title(f"(n = {len(self.draw_time_samples)} frames)", fontsize="medium", wrap=True)
-            plt.xlabel("Draw Times (ms)")
-            plt.ylabel("Frames")
-
-            acceptable = 41.66 # Maximum acceptable draw time
-
-            max_time = max(self.draw_time_samples)
-            max_time = max(max_time, acceptable)
-            bin_width = 2.5 # milliseconds
-
-            if len(self.draw_time_samples) > 0:
-                median = sorted(self.draw_time_samples)[len(self.draw_time_samples)//2]
-                plt.axvline(median, color="black", label="Median draw time", linewidth = 2)
-
-            plt.axvline(acceptable, color="#fc4f30", label="Maximum acceptable time", linewidth=2)
-
-            plt.legend(loc="best")
-            plt.hist(self.draw_time_samples, bins=math.ceil(max_time/bin_width), range=(0, max_time), edgecolor="white")
-
-            plt.tight_layout()
-
-            temp_path = Path(tempfile.gettempdir()) / "c4_histograms"
-            temp_path.mkdir(parents=True, exist_ok=True)
-            
+        if self.draw_times.count:
+            summary = self.draw_times.summary()
+            logger.debug(
+                "Draw times for {}: p50 {:.2f} ms, p95 {:.2f} ms, p99 {:.2f} ms, max {:.2f} ms,"
+                " {}/{} frames over budget",
+                self.__class__.__name__,
+                summary["p50"] * 1000,
+                summary["p95"] * 1000,
+                summary["p99"] * 1000,
+                summary["max"] * 1000,
+                summary["over_budget"],
+                summary["count"],
+            )
+        if self.make_histogram and self.draw_times.count:
+            # just the numbers; the chart is drawn later, by c4_sign.histograms
+            HISTOGRAM_PATH.mkdir(parents=True, exist_ok=True)
             now = arrow.now()
-            plt.savefig(temp_path / f"{now.year}-{now.month}-{now.day}_{self.title}_histogram.png")
-            plt.close()
-
-        pass
+            save_draw_times(
+                HISTOGRAM_PATH / f"{now.year}-{now.month}-{now.day}_{self.title}_histogram.json",
+                self.title,
+                self.artist,
+                self.draw_times,
+            )
 
     def draw(self, canvas: Canvas, delta_time: timedelta):
         # override draw_frame!
         # returns True if we're done updating!
         self.elapsed_time += delta_time
 
-        draw_time = arrow.now()
+        draw_start = perf_counter()
         result = self.draw_frame(canvas, delta_time)
-        draw_time = arrow.now() - draw_time
-
-        if self.make_histogram:
-            self.draw_time_samples.append(draw_time.total_seconds() * 1000) # Append draw time in milliseconds
+        self.draw_times.record(perf_counter() - draw_start)
 
         if self.is_over_max_time:
             logger.warning("Task {} is over max time! Stopping forcefully...", self.__class__.__name__)
@@ -231,6 +214,7 @@ class OptimScreenTask(ScreenTask):
     current_frame = 0
     max_frames = 0
     cache_path = None
+    frames = None
     is_optim = False
     being_optimized = False
     should_optimize = False
@@ -239,49 +223,96 @@ class OptimScreenTask(ScreenTask):
         self,
         suggested_run_time=timedelta(seconds=30),
         max_run_time=timedelta(seconds=60),
+        optimize=True,
     ):
         super().__init__(suggested_run_time, max_run_time)
-        self.cache_path = cache_path() / "optim" / self.__class__.__name__
-        self.cache_path.mkdir(parents=True, exist_ok=True)
-        self.optimize()
+        self.cache_path = self.frame_cache_path()
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        if optimize:
+            self.optimize()
 
     def optimize(self):
         # well, ain't this fun?
         # let's do some optimization!!
         if not self.should_optimize:
             return
+        if self.load_optimized():
+            logger.debug("{} is already optimized!", self.__class__.__name__)
+            return
+        self.render_optimized()
+        self.load_optimized()
+
+    @classmethod
+    def frame_cache_path(cls) -> Path:
+        return cache_path() / "optim" / f"{cls.__name__}.frames"
+
+    @classmethod
+    def needs_rendering(cls) -> bool:
+        """
+        Returns True if the task should be optimized, but its frames haven't been (completely) rendered yet.
+
+        This doesn't create the task, so it can be checked before the task is ever needed.
+        """
+        if not cls.should_optimize:
+            return False
+        try:
+            read_frames(cls.frame_cache_path())
+        except (OSError, ValueError):
+            return True
+        return False
+
+    @classmethod
+    def render_frame_cache(cls):
+        """
+        Creates the task and renders its frames to the cache. Meant to be run in another process
+        (the cache file only shows up once it's complete).
+        """
+        cls(optimize=False).render_optimized()
+
+    def load_optimized(self) -> bool:
+        """
+        Switches over to the cached frames, if they've been rendered.
+
+        Returns True if the task will now play from the cache.
+        """
+        if not self.cache_path.exists():
+            return False
+        try:
+            self.frames = read_frames(self.cache_path)
+        except ValueError as e:
+            logger.warning("Ignoring broken frame cache: {}", e)
+            return False
+        self.max_frames = len(self.frames)
+        self.is_optim = True
+        self.being_optimized = False
+        return True
+
+    def render_optimized(self):
         logger.info(f"Optimizing {self.__class__.__name__}")
         canvas = Canvas()
         delta_time = timedelta(seconds=1 / 24)
         # call child's prepare method
         self.prepare()
         self.being_optimized = True
-        if len(list(self.cache_path.glob("*.png"))):
-            logger.debug("Already optimized!")
-            self.max_frames = len(list(self.cache_path.glob("*.png")))
-            self.teardown()
-            self.is_optim = True
-            self.being_optimized = False
-            return
-        while True:
-            canvas.clear()
-            result = self.draw(canvas, delta_time)
-            canvas.to_jpg(self.cache_path / f"{self.current_frame:04d}.png", 1)
-            self.current_frame += 1
-            if result or self.elapsed_time > self.suggested_run_time:
-                break
-        self.max_frames = self.current_frame
+        with FrameWriter(self.cache_path) as writer:
+            while True:
+                canvas.clear()
+                result = self.draw(canvas, delta_time)
+                writer.append(canvas.data)
+                self.current_frame += 1
+                if result or self.elapsed_time > self.suggested_run_time:
+                    break
         self.teardown()
-        self.is_optim = True
         self.being_optimized = False
-        logger.info(f"Optimized {self.__class__.__name__} with {self.max_frames} frames")
+        logger.info(f"Optimized {self.__class__.__name__} with {writer.frames} frames")
 
     def unoptimize(self):
-        # remove all files in the cache path.
+        # remove the cached frames.
         logger.debug(f"Unoptimizing {self.__class__.__name__}")
         self.max_frames = 0
+        self.frames = None
         self.is_optim = False
-        shutil.rmtree(self.cache_path)
+        self.cache_path.unlink(missing_ok=True)
 
     def prepare(self):
         if self.being_optimized:  # don't run if we're optimizing
@@ -292,8 +323,8 @@ class OptimScreenTask(ScreenTask):
 
     def draw(self, canvas: Canvas, delta_time: timedelta):
         if self.is_optim:
-            # load image from cache path
-            graphics.draw_image(canvas, 0, 0, self.cache_path / f"{self.current_frame:04d}.png")
+            # copy the frame straight out of the cache
+            canvas.data[:] = self.frames[self.current_frame]
             self.current_frame += 1
             if self.current_frame >= self.max_frames:
                 return True
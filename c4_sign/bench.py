@@ -0,0 +1,137 @@
+"""
+Benchmarks screen tasks without a screen: `python -m c4_sign --bench [TaskName ...]`.
+
+Every task is drawn for a fixed number of frames onto an offscreen canvas, and the time
+each frame took is reported. Leave out the names to benchmark every task.
+"""
+import json
+from datetime import timedelta
+from time import perf_counter
+
+import numpy
+from loguru import logger
+
+from c4_sign.base_task import OptimScreenTask
+from c4_sign.lib.canvas import Canvas
+from c4_sign.lib.telemetry import FRAME_BUDGET
+from c4_sign.ScreenManager import ScreenManager, TaskEntry
+
+
+def benchmark_task(entry: TaskEntry, frames: int = 240) -> dict:
+    """
+    Draws a task for a number of frames, a 24th of a second apart, and times each one.
+
+    If the task finishes early, it's prepared again and keeps going. OptimScreenTasks draw
+    their frames live, since that's what the frame cache is rendered with.
+
+    :param entry: The task, from the ScreenManager.
+    :param frames: How many frames to draw.
+    :return: The times (in milliseconds) it took to create and prepare the task, and to draw its frames.
+    """
+    if issubclass(entry.task_class, OptimScreenTask):
+        entry.task_class.should_optimize = False
+
+    start = perf_counter()
+    task = entry.get()
+    init_time = perf_counter() - start
+    if task is None:
+        raise RuntimeError(f"Couldn't create {entry.name}")
+
+    start = perf_counter()
+    ready = task.prepare()
+    prepare_time = perf_counter() - start
+    if ready is False:
+        raise RuntimeError(f"{entry.name} isn't ready to run (prepare returned False)")
+
+    canvas = Canvas()
+    delta_time = timedelta(seconds=1 / 24)
+    times = numpy.empty(frames)
+    restarts = 0
+    done = False
+    for i in range(frames):
+        canvas.clear()
+        start = perf_counter()
+        done = task.draw(canvas, delta_time)
+        times[i] = perf_counter() - start
+        if done:
+            # draw has already torn it down
+            restarts += 1
+            task.prepare()
+    if not done:
+        task.teardown(forced=True)
+
+    times *= 1000
+    p50, p95, p99 = numpy.percentile(times, [50, 95, 99])
+    return {
+        "task": entry.name,
+        "frames": frames,
+        "restarts": restarts,
+        "init_ms": init_time * 1000,
+        "prepare_ms": prepare_time * 1000,
+        "fps": frames / (times.sum() / 1000),
+        "mean_ms": times.mean(),
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "max_ms": times.max(),
+        "over_budget": int((times > FRAME_BUDGET * 1000).sum()),
+    }
+
+
+def run_bench(names: list[str], frames: int = 240, as_json: bool = False) -> int:
+    """
+    Benchmarks the tasks with the given names (or all of them), and prints the results.
+
+    A task is over budget if its 99th percentile frame takes longer than a frame lasts (41.66 ms).
+
+    :return: The exit code: 0 if every task is within budget, 1 if not, 2 if a task couldn't be found or run.
+    """
+    screen_manager = ScreenManager(False, warm_up=False, optimize=False)
+    screen_manager.update_tasks()
+    entries = {entry.name: entry for entry in screen_manager.tasks}
+    unknown = [name for name in names if name not in entries]
+    if unknown:
+        logger.error("No such task(s): {}. Try one of: {}", ", ".join(unknown), ", ".join(sorted(entries)))
+        return 2
+
+    results = []
+    failed = []
+    for name in names or sorted(entries):
+        logger.info("Benchmarking {} for {} frames", name, frames)
+        try:
+            results.append(benchmark_task(entries[name], frames))
+        except Exception as e:
+            logger.error("Couldn't benchmark {}!", name)
+            logger.exception(e)
+            failed.append(name)
+    over_budget = [result["task"] for result in results if result["p99_ms"] > FRAME_BUDGET * 1000]
+
+    if as_json:
+        print(
+            json.dumps(
+                {
+                    "budget_ms": FRAME_BUDGET * 1000,
+                    "results": results,
+                    "over_budget": over_budget,
+                    "failed": failed,
+                },
+                indent=2,
+            )
+        )
+    else:
+        print(f"{'Task':<20} {'fps':>8} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'over':>6}")
+        for result in results:
+            print(
+                f"{result['task']:<20} {result['fps']:>8.0f}"
+                f" {result['mean_ms']:>8.2f} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f}"
+                f" {result['p99_ms']:>8.2f} {result['max_ms']:>8.2f} {result['over_budget']:>6}"
+            )
+        print(f"(times in ms; 'over' is frames longer than {FRAME_BUDGET * 1000:.2f} ms)")
+        if over_budget:
+            print(f"Over budget: {', '.join(over_budget)}")
+        if failed:
+            print(f"Failed: {', '.join(failed)}")
+
+    if failed:
+        return 2
+    return 1 if over_budget else 0
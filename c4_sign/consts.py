@@ -1,7 +1,10 @@
-from pkg_resources import resource_filename
+from pathlib import Path
 
 from c4_sign.lib import graphics
 
+# fonts are only loaded the first time they're used
+FONTS = Path(__file__).parent / "fonts"
+
 MOTD_TEXT = "Welcome to Cornell!"
 
 DEV_MODE = True
@@ -19,7 +22,7 @@ COLOR_PURPLE = (191, 90, 242)
 COLOR_PINK = (255, 55, 95)
 COLOR_BROWN = (172, 142, 104)
 COLOR_GRAY = (152, 152, 157)
-FONT_PICO = graphics.Font(resource_filename(__name__, "fonts/pico.bdf"))
-FONT_4x6 = graphics.Font(resource_filename(__name__, "fonts/4x6.bdf"))
-FONT_5x7 = graphics.Font(resource_filename(__name__, "fonts/5x7.bdf"))
-FONT_9x15 = graphics.Font(resource_filename(__name__, "fonts/9x15.bdf"))
+FONT_PICO = graphics.Font(FONTS / "pico.bdf")
+FONT_4x6 = graphics.Font(FONTS / "4x6.bdf")
+FONT_5x7 = graphics.Font(FONTS / "5x7.bdf")
+FONT_9x15 = graphics.Font(FONTS / "9x15.bdf")
@@ -1,4 +1,5 @@
 import logging
+import queue
 import webbrowser
 from multiprocessing import Queue
 from threading import Thread
@@ -6,22 +7,45 @@ from threading import Thread
 import flask
 from flask_socketio import SocketIO
 
+from c4_sign.lib.screen.shared_frame import SharedFrame
+
 log = logging.getLogger("werkzeug")
 log.setLevel(logging.ERROR)
 
 
-def emit_to_web(emit, to_web: Queue):
+# how often to check for a new frame
+FRAME_POLL_INTERVAL = 1 / 60
+
+
+def emit_to_web(emit, to_web: Queue, frame: SharedFrame):
+    sequence = None
     while True:
-        data = to_web.get()
-        emit("update", data)
+        # only the newest message of each type matters, so if we've fallen behind, skip the rest
+        latest = {}
+        try:
+            data = to_web.get(timeout=FRAME_POLL_INTERVAL)
+            while True:
+                latest[data["type"]] = data
+                data = to_web.get_nowait()
+        except queue.Empty:
+            pass
+        for data in latest.values():
+            emit("update", data)
+
+        new_frame = frame.read(sequence)
+        if new_frame is not None:
+            sequence, pixels = new_frame
+            # the raw RGB bytes, which socket.io sends to the browser as-is (as binary)
+            emit("update", {"type": "display", "canvas": pixels})
 
 
-def start_server(to_web: Queue, from_web: Queue):
+def start_server(to_web: Queue, from_web: Queue, frame: SharedFrame):
     thread = Thread(
         target=emit_to_web,
         args=(
             socketio.emit,
             to_web,
+            frame,
         ),
         daemon=True,
     )
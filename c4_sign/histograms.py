@@ -0,0 +1,68 @@
+"""
+Draws charts of the draw times saved by the sign when it's run with --histograms.
+
+This is kept apart from the sign itself, since matplotlib is slow to import and slower to draw;
+run it after the fact with `python -m c4_sign.histograms [folder]`.
+"""
+import math
+import sys
+from pathlib import Path
+from typing import Union
+
+from loguru import logger
+
+from c4_sign.lib.telemetry import FRAME_BUDGET, HISTOGRAM_PATH, load_draw_times
+
+
+def draw_chart(path: Union[str, Path], output: Union[str, Path]):
+    """
+    Draws a chart of the draw times saved at path.
+
+    :param path: A .json file saved by a task.
+    :param output: Where to save the chart (a .png file).
+    """
+    from matplotlib import pyplot as plt
+
+    title, artist, histogram = load_draw_times(path)
+    times, counts = histogram.samples()
+    times = times * 1000  # milliseconds
+
+    plt.style.use("fivethirtyeight")
+
+    plt.suptitle("Draw time frequency for '" + title + "' by " + artist, wrap=True)
+    plt.title(f"(n = {histogram.count} frames)", fontsize="medium", wrap=True)
+    plt.xlabel("Draw Times (ms)")
+    plt.ylabel("Frames")
+
+    acceptable = FRAME_BUDGET * 1000  # Maximum acceptable draw time
+
+    max_time = max(histogram.max * 1000, acceptable)
+    bin_width = 2.5  # milliseconds
+
+    plt.axvline(histogram.percentile(50) * 1000, color="black", label="Median draw time", linewidth=2)
+    plt.axvline(histogram.percentile(99) * 1000, color="#8b8b8b", label="99th percentile", linewidth=2)
+    plt.axvline(acceptable, color="#fc4f30", label="Maximum acceptable time", linewidth=2)
+
+    plt.legend(loc="best")
+    plt.hist(times, weights=counts, bins=math.ceil(max_time / bin_width), range=(0, max_time), edgecolor="white")
+
+    plt.tight_layout()
+    plt.savefig(output)
+    plt.close()
+
+
+def draw_charts(folder: Union[str, Path] = HISTOGRAM_PATH):
+    """
+    Draws a chart next to every saved set of draw times in folder.
+    """
+    for path in sorted(Path(folder).glob("*.json")):
+        logger.info("Drawing chart for {}", path.name)
+        try:
+            draw_chart(path, path.with_suffix(".png"))
+        except Exception as e:
+            logger.error("Couldn't draw a chart for {}!", path.name)
+            logger.exception(e)
+
+
+if __name__ == "__main__":
+    draw_charts(sys.argv[1] if len(sys.argv) > 1 else HISTOGRAM_PATH)
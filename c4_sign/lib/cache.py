@@ -0,0 +1,22 @@
+import platform
+from pathlib import Path
+
+
+def cache_path() -> Path:
+    """
+    Returns the path to the cache folder
+
+    Returns:
+        Path: The path to the cache folder
+    """
+    system = platform.system()
+    if system == "Windows":
+        p = Path.home() / "AppData" / "Local" / "c4_sign" / "cache"
+    elif system == "Linux":
+        p = Path.home() / ".cache" / "c4_sign"
+    elif system == "Darwin":
+        p = Path.home() / "Library" / "Caches" / "c4_sign"
+    else:
+        raise NotImplementedError(f"Platform {system} not supported")
+    p.mkdir(parents=True, exist_ok=True)
+    return p
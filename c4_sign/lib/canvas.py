@@ -4,6 +4,34 @@ from typing import Union
 import numpy
 
 
+def color_weights(color: Union[int, tuple[int, int, int], tuple[int, int, int, int]]):
+    """
+    Splits a color into its RGB components and the weights used to blend it over the existing pixel.
+
+    The blend is always ``rgb * fg_weight + background * bg_weight``, which matches what set_pixel has always done
+    for both the tuple (alpha is transparency) and the 0xAARRGGBB (alpha is opacity) formats.
+
+    :param color: The color to split.
+    :return: A tuple of ((r, g, b), fg_weight, bg_weight). bg_weight is 0 for opaque colors.
+    """
+    if isinstance(color, tuple):
+        if len(color) == 3:
+            return color, 1.0, 0.0
+        a = color[3] / 255
+        return color[:3], 1 - a, a
+    # note: we cannot pass a 0xRRGGBBAA color directly. if there is no red, the GBA will be interpreted as RGB.
+    # so, i'm making alpha be the first bit, and then the rest is the color. (0xAARRGGBB)
+    a = (color >> 24) & 0xFF
+    if a == 0:
+        # we can only assume that if the alpha is 0, it's in the format 0xRRGGBB
+        # and, therefore, it should be fully opaque.
+        # if this is not the case, the user should use the tuple format.
+        # (or, better yet, not call this because it's fully transparent and it's a waste of time.)
+        a = 255
+    a /= 255
+    return ((color >> 16) & 0xFF, (color >> 8) & 0xFF, color & 0xFF), a, 1 - a
+
+
 class Canvas:
     def __init__(self):
         self.width = 32
@@ -17,36 +45,124 @@ class Canvas:
         if x < 0 or x >= self.width or y < 0 or y >= self.height:
             return  # Just ignore mistakes
 
-        if isinstance(color, tuple):
-            if len(color) == 3:
-                self.data[y][x] = color
-            else:
-                br, bg, bb = self.data[y][x]
-                a = color[3] / 255
-                r = int(color[0] * (1 - a) + br * a)
-                g = int(color[1] * (1 - a) + bg * a)
-                b = int(color[2] * (1 - a) + bb * a)
-                self.data[y][x] = (r, g, b)
-        else:
-            # note: we cannot pass a 0xRRGGBBAA color directly. if there is no red, the GBA will be interpreted as RGB.
-            # so, i'm making alpha be the first bit, and then the rest is the color. (0xAARRGGBB)
-            a = (color >> 24) & 0xFF
-            if a == 0:
-                # we can only assume that if the alpha is 0, it's in the format 0xRRGGBB
-                # and, therefore, it should be fully opaque.
-                # if this is not the case, the user should use the tuple format.
-                # (or, better yet, not call this because it's fully transparent and it's a waste of time.)
-                a = 255
-            r = (color >> 16) & 0xFF
-            g = (color >> 8) & 0xFF
-            b = color & 0xFF
-            # handle alpha
-            br, bg, bb = self.data[y][x]
-            a /= 255
-            r = int(r * a + br * (1 - a))
-            g = int(g * a + bg * (1 - a))
-            b = int(b * a + bb * (1 - a))
+        (r, g, b), fg_weight, bg_weight = color_weights(color)
+        if bg_weight == 0:
             self.data[y][x] = (r, g, b)
+            return
+        # handle alpha
+        br, bg, bb = self.data[y][x]
+        r = int(r * fg_weight + br * bg_weight)
+        g = int(g * fg_weight + bg * bg_weight)
+        b = int(b * fg_weight + bb * bg_weight)
+        self.data[y][x] = (r, g, b)
+
+    def set_pixels(
+        self,
+        xs,
+        ys,
+        color: Union[int, tuple[int, int, int], tuple[int, int, int, int], numpy.ndarray],
+        alpha=None,
+    ):
+        """
+        Sets many pixels at once. This is much faster than calling set_pixel in a loop!
+
+        Coordinates outside the canvas are ignored, just like set_pixel. Each coordinate is only written once,
+        so duplicated coordinates will not have transparent colors blended over themselves.
+
+        :param xs: The x-coordinates of the pixels, as a sequence or numpy array.
+        :param ys: The y-coordinates of the pixels, as a sequence or numpy array.
+        :param color: Either a single Color for every pixel, or an (N, 3) array with one color per pixel.
+        :param alpha: Optional opacity (0-255) for an array of colors, either one value or one per pixel.
+        :return: None.
+        """
+        xs = numpy.asarray(xs, dtype=numpy.intp).ravel()
+        ys = numpy.asarray(ys, dtype=numpy.intp).ravel()
+        keep = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        if isinstance(color, numpy.ndarray):
+            color = color.reshape(-1, 3)[keep]
+            if alpha is not None and numpy.ndim(alpha) > 0:
+                alpha = numpy.asarray(alpha).ravel()[keep]
+        xs, ys = xs[keep], ys[keep]
+        self.data[ys, xs] = self._blend(self.data[ys, xs], color, alpha)
+
+    def set_mask(
+        self,
+        mask: numpy.ndarray,
+        color: Union[int, tuple[int, int, int], tuple[int, int, int, int], numpy.ndarray],
+        x: int = 0,
+        y: int = 0,
+        alpha=None,
+    ):
+        """
+        Sets every pixel covered by a boolean mask, with the mask's top left corner placed at (x, y).
+
+        The mask may hang off any edge of the canvas; only the part that overlaps the canvas is drawn.
+
+        :param mask: A 2D boolean array. True pixels are drawn, False pixels are left alone.
+        :param color: Either a single Color, or an array of colors the same height and width as the mask.
+        :param x: The x-coordinate of the mask's top left corner.
+        :param y: The y-coordinate of the mask's top left corner.
+        :param alpha: Optional opacity (0-255) for an array of colors, either one value or one per pixel.
+        :return: None.
+        """
+        height, width = mask.shape
+        x1, y1 = max(0, x), max(0, y)
+        x2, y2 = min(self.width, x + width), min(self.height, y + height)
+        if x1 >= x2 or y1 >= y2:
+            return  # entirely off screen
+
+        source = (slice(y1 - y, y2 - y), slice(x1 - x, x2 - x))
+        mask = mask[source]
+        if isinstance(color, numpy.ndarray):
+            color = color[source][mask]
+            if alpha is not None and numpy.ndim(alpha) > 0:
+                alpha = numpy.asarray(alpha)[source][mask]
+        region = self.data[y1:y2, x1:x2]
+        region[mask] = self._blend(region[mask], color, alpha)
+
+    def set_rect(
+        self,
+        x: int,
+        y: int,
+        width: int,
+        height: int,
+        color: Union[int, tuple[int, int, int], tuple[int, int, int, int]],
+    ):
+        """
+        Sets every pixel in a rectangle, with its top left corner at (x, y).
+
+        The rectangle may hang off any edge of the canvas; only the part that overlaps the canvas is drawn.
+
+        :param x: The x-coordinate of the rectangle's top left corner.
+        :param y: The y-coordinate of the rectangle's top left corner.
+        :param width: The width of the rectangle, in pixels.
+        :param height: The height of the rectangle, in pixels.
+        :param color: The color to set the pixels to.
+        :return: None.
+        """
+        x1, y1 = max(0, x), max(0, y)
+        x2, y2 = min(self.width, x + width), min(self.height, y + height)
+        if x1 >= x2 or y1 >= y2:
+            return  # entirely off screen
+
+        region = self.data[y1:y2, x1:x2]
+        region[...] = self._blend(region, color)
+
+    @staticmethod
+    def _blend(current: numpy.ndarray, color, alpha=None) -> numpy.ndarray:
+        # current is an (..., 3) array of the pixels being drawn over
+        if isinstance(color, numpy.ndarray):
+            if alpha is None:
+                return color
+            fg_weight = numpy.asarray(alpha, dtype=numpy.float64)[..., numpy.newaxis] / 255
+            bg_weight = 1 - fg_weight
+            rgb = color
+        else:
+            rgb, fg_weight, bg_weight = color_weights(color)
+            if bg_weight == 0:
+                return rgb
+            rgb = numpy.array(rgb)
+        return (rgb * fg_weight + current * bg_weight).astype(numpy.uint8)
 
     def clear(self):
         self.data.fill(0)
@@ -0,0 +1,213 @@
+import math
+
+import numpy
+
+LOG_2 = math.log(2)
+
+
+def complex_grid(center: complex, scale: float, width: int = 32, height: int = 32) -> numpy.ndarray:
+    """
+    Map every pixel of a width x height canvas onto the complex plane.
+
+    The top-left pixel is at center - scale/2 (on both axes), the bottom-right pixel
+    is at center + scale/2. The result is indexed [y, x], just like Canvas.data.
+
+    :param center: the point in the middle of the view
+    :param scale: the width (and height) of the view
+    :param width: the number of columns
+    :param height: the number of rows
+    :return: a (height, width) complex array
+    """
+    u_min = center.real - scale / 2
+    u_max = center.real + scale / 2
+    v_min = center.imag - scale / 2
+    v_max = center.imag + scale / 2
+    u = u_min + (u_max - u_min) * numpy.arange(width) / (width - 1)
+    v = v_min + (v_max - v_min) * numpy.arange(height) / (height - 1)
+    grid = numpy.empty((height, width), dtype=numpy.complex128)
+    grid.real = u[numpy.newaxis, :]
+    grid.imag = v[:, numpy.newaxis]
+    return grid
+
+
+def magnitude_squared(z: numpy.ndarray) -> numpy.ndarray:
+    """
+    |z|^2, without the square root abs() would take.
+
+    :param z: complex array
+    :return: float array
+    """
+    return z.real * z.real + z.imag * z.imag
+
+
+def _complex(real: numpy.ndarray, imag: numpy.ndarray) -> numpy.ndarray:
+    z = numpy.empty(real.shape, dtype=numpy.complex128)
+    z.real = real
+    z.imag = imag
+    return z
+
+
+def mandelbrot_step(z: numpy.ndarray, c) -> numpy.ndarray:
+    """
+    z^2 + c, used by both the Mandelbrot and Julia sets.
+
+    The square is expanded by hand so every pixel comes out bit-for-bit the same as the
+    scalar (a*c - b*d) + (a*d + b*c)i formula; numpy's complex multiply rounds differently.
+    """
+    x = z.real
+    y = z.imag
+    return _complex(x * x - y * y + numpy.real(c), x * y + y * x + numpy.imag(c))
+
+
+def burning_ship_step(z: numpy.ndarray, c) -> numpy.ndarray:
+    """
+    (|Re(z)| + i|Im(z)|)^2 + c
+    """
+    x = numpy.abs(z.real)
+    y = numpy.abs(z.imag)
+    return _complex(x * x - y * y + numpy.real(c), x * y + y * x + numpy.imag(c))
+
+
+def mandelbrot_interior(c: numpy.ndarray) -> numpy.ndarray:
+    """
+    Find the points that are inside the main cardioid or the period-2 bulb.
+
+    Those never escape, so there's no point in iterating them.
+
+    :param c: complex array
+    :return: boolean array, True where the point is known to be in the set
+    """
+    u = c.real
+    v = c.imag
+    # 2-bulb check
+    bulb = (u + 1) * (u + 1) + v * v <= 0.0625
+    # Cardioid check
+    q = (u - 1 / 4) * (u - 1 / 4) + v * v
+    cardioid = q * (q + (u - 1 / 4)) <= 1 / 4 * v**2
+    return bulb | cardioid
+
+
+def escape_time(z, c, iterations: int, step=mandelbrot_step, skip=None):
+    """
+    Iterate z = step(z, c) for every point until |z| >= 2 or we run out of iterations.
+
+    :param z: complex array of starting values
+    :param c: complex array (same shape as z) or a single complex number
+    :param iterations: the maximum number of iterations
+    :param step: the function to iterate, see mandelbrot_step and burning_ship_step
+    :param skip: optional boolean array of points known to be in the set
+    :return: (counts, z) - the number of iterations each point took and its final value.
+        Points that never escaped (or were skipped) have a count of `iterations`.
+    """
+    return EscapeTime(step).iterate(z, c, iterations, skip)
+
+
+class EscapeTime:
+    """
+    escape_time, but it remembers where it left off.
+
+    Only the points that haven't escaped yet are carried into the next iteration, so the
+    work shrinks as the picture fills in. As long as the view stays the same (same z, c
+    and skip), asking for more iterations than last time only advances those points by
+    the difference, instead of starting every orbit over from z. Any change to the view
+    (or asking for fewer iterations) starts over.
+    """
+
+    def __init__(self, step=mandelbrot_step):
+        self.step = step
+        self.iterations = 0
+        self.__view = None
+        self.__z = None
+        self.__counts = None
+        self.__active = None
+        self.__z_active = None
+        self.__c_active = None
+
+    def iterate(self, z, c, iterations: int, skip=None):
+        """
+        :param z: complex array of starting values
+        :param c: complex array (same shape as z) or a single complex number
+        :param iterations: the maximum number of iterations
+        :param skip: optional boolean array of points known to be in the set
+        :return: (counts, z), see escape_time
+        """
+        z = numpy.asarray(z, dtype=numpy.complex128)
+        if iterations < self.iterations or not self.__same_view(z, c, skip):
+            self.__reset(z, c, skip)
+
+        for count in range(self.iterations + 1, iterations + 1):
+            if self.__active.size == 0:
+                break
+            self.__z_active = self.step(self.__z_active, self.__c_active)
+            inside = magnitude_squared(self.__z_active) < 4.0
+            if not inside.all():
+                escaped = self.__active[~inside]
+                self.__z[escaped] = self.__z_active[~inside]
+                self.__counts[escaped] = count
+                self.__active = self.__active[inside]
+                self.__z_active = self.__z_active[inside]
+                if numpy.ndim(self.__c_active) != 0:
+                    self.__c_active = self.__c_active[inside]
+        self.iterations = iterations
+
+        counts = numpy.where(self.__counts < 0, iterations, self.__counts)
+        z = self.__z.copy()
+        z[self.__active] = self.__z_active
+        return counts.reshape(self.__view[0].shape), z.reshape(self.__view[0].shape)
+
+    def __same_view(self, z, c, skip) -> bool:
+        if self.__view is None:
+            return False
+        view_z, view_c, view_skip = self.__view
+        return numpy.array_equal(z, view_z) and numpy.array_equal(c, view_c) and numpy.array_equal(skip, view_skip)
+
+    def __reset(self, z, c, skip):
+        self.__view = (z.copy(), numpy.copy(c), None if skip is None else numpy.copy(skip))
+        self.iterations = 0
+        self.__z = z.ravel().copy()
+        # -1 means "hasn't escaped (yet)"
+        self.__counts = numpy.full(self.__z.size, -1, dtype=int)
+
+        running = magnitude_squared(self.__z) < 4.0
+        self.__counts[~running] = 0
+        if skip is not None:
+            skip = numpy.asarray(skip).ravel()
+            self.__counts[skip] = -1
+            running &= ~skip
+        self.__active = numpy.flatnonzero(running)
+
+        self.__z_active = self.__z[self.__active]
+        if numpy.ndim(c) == 0:
+            self.__c_active = c
+        else:
+            self.__c_active = numpy.broadcast_to(c, z.shape).ravel()[self.__active]
+
+
+def continuous_index(counts: numpy.ndarray, z: numpy.ndarray) -> numpy.ndarray:
+    """
+    Smooth out the iteration counts so the color bands blend into each other.
+    https://www.paridebroggi.com/blogpost/2015/05/06/fractal-continuous-coloring/
+
+    Only pass in the points that escaped; |z| is zero for some of the others.
+
+    :param counts: iteration counts from escape_time
+    :param z: final values from escape_time
+    :return: float array
+    """
+    return counts + 1 - (LOG_2 / numpy.sqrt(magnitude_squared(z))) / LOG_2
+
+
+def sine_colors(index: numpy.ndarray, amplitudes=(127.5, 127.5, 127.5)) -> numpy.ndarray:
+    """
+    Turn a (continuous) index into colors with three out-of-phase sine waves.
+
+    Each channel is sin(frequency * index + phase) * amplitude + amplitude.
+
+    :param index: float array, see continuous_index
+    :param amplitudes: the amplitude of the red, green and blue waves
+    :return: an index.shape + (3,) uint8 array
+    """
+    colors = numpy.empty(numpy.shape(index) + (3,), dtype=numpy.uint8)
+    for channel, (frequency, phase, amplitude) in enumerate(zip((0.1, 0.13, 0.16), (1, 2, 4), amplitudes)):
+        colors[..., channel] = (numpy.sin(frequency * index + phase) * amplitude + amplitude).astype(int)
+    return colors
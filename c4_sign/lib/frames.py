@@ -0,0 +1,88 @@
+import os
+import struct
+from pathlib import Path
+from typing import Union
+
+import numpy
+
+# A frame file is a small header followed by every frame packed back to back,
+# so that the whole thing can be mapped straight into a (frames, height, width, 3) array.
+MAGIC = b"C4FRAMES"
+VERSION = 1
+HEADER = struct.Struct("<8sIIII8x")  # magic, version, frames, height, width (32 bytes)
+
+
+class FrameWriter:
+    """
+    Writes frames one at a time to a frame file.
+
+    Frames go to a temporary file first; the real file only appears (with the
+    final frame count in its header) once the writer is closed, so a frame file
+    on disk is always complete.
+
+    Use it as a context manager:
+
+        with FrameWriter(path) as writer:
+            writer.append(canvas.data)
+    """
+
+    def __init__(self, path: Union[str, Path], height: int = 32, width: int = 32):
+        self.path = Path(path)
+        self.height = height
+        self.width = width
+        self.frames = 0
+        self.__temp_path = self.path.with_name(self.path.name + ".tmp")
+        self.__file = self.__temp_path.open("wb")
+        self.__file.write(HEADER.pack(MAGIC, VERSION, 0, height, width))
+
+    def append(self, frame: numpy.ndarray):
+        """
+        :param frame: a (height, width, 3) uint8 array, like Canvas.data
+        """
+        if frame.shape != (self.height, self.width, 3):
+            raise ValueError(f"Expected a frame of shape {(self.height, self.width, 3)}, got {frame.shape}")
+        self.__file.write(numpy.ascontiguousarray(frame, dtype=numpy.uint8).tobytes())
+        self.frames += 1
+
+    def close(self):
+        self.__file.seek(0)
+        self.__file.write(HEADER.pack(MAGIC, VERSION, self.frames, self.height, self.width))
+        self.__file.close()
+        os.replace(self.__temp_path, self.path)
+
+    def abort(self):
+        self.__file.close()
+        self.__temp_path.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def read_frames(path: Union[str, Path]) -> numpy.ndarray:
+    """
+    Maps a frame file into memory. Nothing is read until a frame is actually used.
+
+    :param path: the frame file, as written by FrameWriter
+    :return: a read-only (frames, height, width, 3) uint8 array
+    :raises ValueError: if the file isn't a (complete) frame file
+    """
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+    if len(header) != HEADER.size:
+        raise ValueError(f"{path} is too short to be a frame file")
+    magic, version, frames, height, width = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} frame file")
+    shape = (frames, height, width, 3)
+    if os.path.getsize(path) != HEADER.size + frames * height * width * 3:
+        raise ValueError(f"{path} is truncated")
+    if frames == 0:
+        # mmap can't map an empty region
+        return numpy.zeros(shape, dtype=numpy.uint8)
+    return numpy.memmap(path, dtype=numpy.uint8, mode="r", offset=HEADER.size, shape=shape)
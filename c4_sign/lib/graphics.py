@@ -1,11 +1,22 @@
+import hashlib
+import json
+import os
+import threading
+import zipfile
+from functools import cached_property, lru_cache
 from pathlib import Path
 from typing import Union
 
 import bdfparser
 import numpy
+from loguru import logger
 from PIL import Image
 
-from .canvas import Canvas
+from .cache import cache_path
+from .canvas import Canvas, color_weights
+
+# bump this whenever the layout of the font cache changes
+FONT_CACHE_VERSION = 1
 
 Color = Union[int, tuple[int, int, int], tuple[int, int, int, int]]
 
@@ -89,14 +100,17 @@ def __stroke_line_low(
     D = (2 * dy) - dx
     y = y1
 
+    ys = []
     for x in range(x1, x2):
-        canvas.set_pixel(x, y, color)
+        ys.append(y)
         if D > 0:
             y = y + yi
             D = D + (2 * (dy - dx))
         else:
             D = D + 2 * dy
 
+    canvas.set_pixels(range(x1, x2), ys, color)
+
 
 def __stroke_line_high(
     canvas: Canvas,
@@ -115,21 +129,23 @@ def __stroke_line_high(
     D = (2 * dx) - dy
     x = x1
 
+    xs = []
     for y in range(y1, y2):
-        canvas.set_pixel(x, y, color)
+        xs.append(x)
         if D > 0:
             x = x + xi
             D = D + (2 * (dx - dy))
         else:
             D = D + 2 * dx
 
+    canvas.set_pixels(xs, range(y1, y2), color)
+
 
 def __stroke_horizontal_line(canvas: Canvas, x1: int, x2: int, y: int, color: Color) -> None:
     a = min(x1, x2)
     b = max(x1, x2)
 
-    for i in range(a, b + 1):
-        canvas.set_pixel(i, y, color)
+    canvas.set_rect(a, y, b - a + 1, 1, color)
 
 
 def stroke_rect(
@@ -159,17 +175,12 @@ def stroke_rect(
     dy = abs(y2 - y1)
     y = min(y1, y2)
 
-    for i in range(x, x + dx + 1):
-        canvas.set_pixel(i, y, color)
-
-    for i in range(x, x + dx + 1):
-        canvas.set_pixel(i, y + dy, color)
-
-    for i in range(y + 1, y + dy):
-        canvas.set_pixel(x, i, color)
-
-    for i in range(y + 1, y + dy):
-        canvas.set_pixel(x + dx, i, color)
+    # top, bottom, left, right.
+    # (these overlap for rectangles that are one pixel thin, which blends transparent colors twice. that's on purpose!)
+    canvas.set_rect(x, y, dx + 1, 1, color)
+    canvas.set_rect(x, y + dy, dx + 1, 1, color)
+    canvas.set_rect(x, y + 1, 1, dy - 1, color)
+    canvas.set_rect(x + dx, y + 1, 1, dy - 1, color)
 
 
 def fill_rect(
@@ -199,9 +210,7 @@ def fill_rect(
     x = min(x1, x2)
     y = min(y1, y2)
 
-    for i in range(dx + 1):
-        for j in range(dy + 1):
-            canvas.set_pixel(x + i, y + j, color)
+    canvas.set_rect(x, y, dx + 1, dy + 1, color)
 
 
 def stroke_ellipse(
@@ -223,51 +232,7 @@ def stroke_ellipse(
     :param color: The color of the ellipse.
     :return: None.
     """
-    # Implementation of midpoint-ellipse algorithm: https://www.geeksforgeeks.org/midpoint-ellipse-drawing-algorithm/
-    x = 0
-    y = ry
-
-    d1 = (ry * ry) - (rx * rx * ry) + (0.25 * rx * rx)
-
-    dx = 2 * ry * ry * x
-    dy = 2 * rx * rx * y
-
-    while dx < dy:
-        canvas.set_pixel(x + cx, y + cy, color)
-        canvas.set_pixel(-x + cx, y + cy, color)
-        canvas.set_pixel(x + cx, -y + cy, color)
-        canvas.set_pixel(-x + cx, -y + cy, color)
-
-        # PLOT
-        if d1 < 0:
-            x += 1
-            dx = dx + 2 * ry * ry
-            d1 = d1 + dx + ry * ry
-        else:
-            x += 1
-            y -= 1
-            dx = dx + (2 * ry * ry)
-            dy = dy - (2 * rx * rx)
-            d1 = d1 + dx - dy + (ry * ry)
-
-    d2 = ((ry * ry) * ((x + 0.5) * (x + 0.5))) + ((rx * rx) * ((y - 1) * (y - 1))) - (rx * rx * ry * ry)
-
-    while y >= 0:
-        canvas.set_pixel(x + cx, y + cy, color)
-        canvas.set_pixel(-x + cx, y + cy, color)
-        canvas.set_pixel(x + cx, -y + cy, color)
-        canvas.set_pixel(-x + cx, -y + cy, color)
-
-        if d2 > 0:
-            y -= 1
-            dy = dy - (2 * rx * rx)
-            d2 = d2 + (rx * rx) - dy
-        else:
-            y -= 1
-            x += 1
-            dx = dx + (2 * ry * ry)
-            dy = dy - (2 * rx * rx)
-            d2 = d2 + dx - dy + (rx * rx)
+    __draw_ellipse_table(canvas, cx, cy, __ellipse_table(rx, ry, False), color)
 
 
 def fill_ellipse(
@@ -289,9 +254,48 @@ def fill_ellipse(
     :param color: The color of the ellipse.
     :return: None.
     """
+    __draw_ellipse_table(canvas, cx, cy, __ellipse_table(rx, ry, True), color)
+
+
+def __draw_ellipse_table(canvas: Canvas, cx: int, cy: int, table, color: Color) -> None:
+    offsets, lengths = table
+    _, _, bg_weight = color_weights(color)
+    if bg_weight == 0:
+        # opaque colors look the same no matter how many times a pixel is drawn
+        lengths = lengths[:1]
+    for n in lengths:
+        canvas.set_pixels(offsets[:n, 0] + cx, offsets[:n, 1] + cy, color)
+
+
+@lru_cache(maxsize=256)
+def __ellipse_table(rx: int, ry: int, filled: bool):
+    # the midpoint algorithm draws some pixels more than once (where the quadrants meet, and where spans overlap),
+    # which blends transparent colors more than once. so that the look stays the same, the table is every pixel offset
+    # sorted by how many times it's drawn, along with how many offsets are drawn at least once, twice, etc.
+    points = []
+    for x, y in __midpoint_ellipse(rx, ry):
+        if filled:
+            for i in range(-x, x + 1):
+                points.append((i, y))
+                points.append((i, -y))
+        else:
+            points.extend(((x, y), (-x, y), (x, -y), (-x, -y)))
+
+    if not points:
+        return numpy.zeros((0, 2), dtype=int), ()
+    offsets, counts = numpy.unique(numpy.array(points), axis=0, return_counts=True)
+    order = numpy.argsort(-counts, kind="stable")
+    offsets, counts = offsets[order], counts[order]
+    offsets.flags.writeable = False
+    lengths = tuple(int((counts > i).sum()) for i in range(counts.max()))
+    return offsets, lengths
+
+
+def __midpoint_ellipse(rx: int, ry: int):
     # Implementation of midpoint-ellipse algorithm: https://www.geeksforgeeks.org/midpoint-ellipse-drawing-algorithm/
-    # See this stackoverflow link for discussion:
+    # See this stackoverflow link for discussion on filling:
     # https://stackoverflow.com/questions/10878209/midpoint-circle-algorithm-for-filled-circles
+    # yields one point per step in the first quadrant, the others are mirrored by the caller.
     x = 0
     y = ry
 
@@ -301,8 +305,7 @@ def fill_ellipse(
     dy = 2 * rx * rx * y
 
     while dx < dy:
-        __stroke_horizontal_line(canvas, -x + cx, x + cx, y + cy, color)
-        __stroke_horizontal_line(canvas, -x + cx, x + cx, -y + cy, color)
+        yield x, y
 
         # PLOT
         if d1 < 0:
@@ -319,8 +322,7 @@ def fill_ellipse(
     d2 = ((ry * ry) * ((x + 0.5) * (x + 0.5))) + ((rx * rx) * ((y - 1) * (y - 1))) - (rx * rx * ry * ry)
 
     while y >= 0:
-        __stroke_horizontal_line(canvas, x + cx, -x + cx, y + cy, color)
-        __stroke_horizontal_line(canvas, x + cx, -x + cx, -y + cy, color)
+        yield x, y
 
         if d2 > 0:
             y -= 1
@@ -396,24 +398,36 @@ def fill_polygon(canvas: Canvas, points: list[tuple[int, int]], color: int) -> N
     """
     min_y = min(points, key=lambda p: p[1])[1]
     max_y = max(points, key=lambda p: p[1])[1]
-
-    for y in range(min_y, max_y + 1):
-        intersections = []
-        for i in range(len(points)):
-            x1, y1 = points[i]
-            x2, y2 = points[(i + 1) % len(points)]
-            if y1 == y2:
-                continue
-            if y1 > y2:
-                x1, y1, x2, y2 = x2, y2, x1, y1
-            if y1 <= y <= y2:
-                x = x1 + (x2 - x1) * (y - y1) / (y2 - y1)
-                intersections.append(x)
-        intersections.sort()
-        for i in range(0, len(intersections), 2):
-            x1 = int(intersections[i])
-            x2 = int(intersections[i + 1])
-            __stroke_horizontal_line(canvas, x1, x2, y, color)
+    # rows that are off screen won't draw anything anyways
+    min_y = max(min_y, 0)
+    max_y = min(max_y, canvas.height - 1)
+    if min_y > max_y:
+        return
+
+    # every edge, with its top end first. horizontal edges never cross a scanline, so they're skipped.
+    start = numpy.array(points)
+    end = numpy.roll(start, -1, axis=0)
+    edges = start[:, 1] != end[:, 1]
+    start, end = start[edges], end[edges]
+    flip = start[:, 1] > end[:, 1]
+    start[flip], end[flip] = end[flip], start[flip].copy()
+    x1, y1 = start[:, 0], start[:, 1]
+    x2, y2 = end[:, 0], end[:, 1]
+
+    # intersect every scanline with every edge at once.
+    # rows are scanlines, columns are edges; edges that miss a scanline are pushed to the end when sorting.
+    y = numpy.arange(min_y, max_y + 1).reshape(-1, 1)
+    crosses = (y1 <= y) & (y <= y2)
+    intersections = numpy.where(crosses, x1 + (x2 - x1) * (y - y1) / (y2 - y1), numpy.inf)
+    intersections.sort(axis=1)
+    counts = crosses.sum(axis=1)
+
+    for row, count in enumerate(counts):
+        # an odd intersection left over (from a scanline passing right through a vertex) doesn't start a span
+        for i in range(0, count - 1, 2):
+            x1 = int(intersections[row, i])
+            x2 = int(intersections[row, i + 1])
+            __stroke_horizontal_line(canvas, x1, x2, min_y + row, color)
 
 
 def draw_image(canvas: Canvas, top_left_x: int, top_left_y: int, image: Union[Path, Image.Image, numpy.ndarray]) -> None:
@@ -454,19 +468,148 @@ def draw_image(canvas: Canvas, top_left_x: int, top_left_y: int, image: Union[Pa
 
 
 class Font:
+    """
+    A BDF font. Nothing is loaded until the font is first used.
+
+    The glyphs are rasterized once and kept in a binary cache (fonts/ in the cache folder), keyed by
+    the hash of the BDF file, so after the first run loading a font is just reading one small file.
+    """
+
     def __init__(self, path):
-        self.bdf_font = bdfparser.Font(path)
-        self.headers = self.bdf_font.headers
-        self.props = self.bdf_font.props
-        self.default_char = self.bdf_font.glyphbycp(0xFFFD)
+        self.path = Path(path)
+        self.__lock = threading.Lock()
+        self.__data = None
+        # codepoint -> index into the glyph arrays
+        self.__index = None
+        self.__masks = None
+
+    @property
+    def headers(self) -> dict:
+        return self.__load()["headers"]
+
+    @property
+    def props(self) -> dict:
+        return self.__load()["props"]
+
+    @property
+    def default_char(self) -> Union[int, None]:
+        """
+        The codepoint drawn in place of missing glyphs, or None if the font doesn't have one.
+        """
+        return self.__load()["default_char"]
+
+    @cached_property
+    def bdf_font(self):
+        """
+        The parsed BDF file, for anything the cache doesn't cover. It's parsed the first time it's asked for
+        (which is slow; avoid it when drawing!) and kept after that.
+        """
+        return bdfparser.Font(str(self.path))
 
     def character_width(self, char: int):
         # Missing glyphs return 0 width in rpi-rgb-led-matrix
         # since i want things to be consistent, i'll do the same
-        if not self.bdf_font.glyphbycp(char):
+        data = self.__load()
+        index = self.__index.get(char)
+        if index is None:
             return 0
 
-        return self.bdf_font.glyphbycp(char).meta["dwx0"]
+        return int(data["advances"][index])
+
+    def glyph(self, char: int) -> tuple[numpy.ndarray, int]:
+        """
+        Looks up a glyph in the font.
+
+        Missing glyphs are replaced with the font's default character (or nothing, if it doesn't have one).
+        :param char: The codepoint of the glyph.
+        :return: A tuple of the glyph's read-only boolean mask (font height by font width) and its advance width.
+        """
+        data = self.__load()
+        index = self.__index.get(char)
+        if index is None:
+            index = self.__index.get(data["default_char"])
+            if index is None:
+                return numpy.zeros(self.__masks.shape[1:], dtype=bool), 0
+        return self.__masks[index], int(data["advances"][index])
+
+    def __load(self) -> dict:
+        if self.__data is None:
+            with self.__lock:
+                if self.__data is None:
+                    data = self.__read_cache()
+                    count = data["codepoints"].size
+                    height, width = data["shape"]
+                    masks = numpy.unpackbits(data["masks"], count=count * height * width)
+                    self.__masks = masks.reshape((count, height, width)).view(bool)
+                    self.__masks.flags.writeable = False
+                    self.__index = {int(codepoint): i for i, codepoint in enumerate(data["codepoints"])}
+                    default_char = int(data["default_char"])
+                    self.__data = {
+                        "headers": json.loads(str(data["headers"])),
+                        "props": json.loads(str(data["props"])),
+                        "advances": data["advances"],
+                        "default_char": default_char if default_char in self.__index else None,
+                    }
+        return self.__data
+
+    def __read_cache(self) -> dict:
+        digest = hashlib.sha256(self.path.read_bytes()).hexdigest()[:16]
+        cache_file = cache_path() / "fonts" / f"{self.path.stem}-{FONT_CACHE_VERSION}-{digest}.npz"
+        try:
+            with numpy.load(cache_file) as data:
+                return dict(data)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, zipfile.BadZipFile) as e:
+            logger.warning("Ignoring broken font cache {}: {}", cache_file, e)
+
+        data = self.__rasterize(self.bdf_font)
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            # write it somewhere else first, so nobody can read half a file
+            temp_file = cache_file.with_name(f"{cache_file.stem}.{os.getpid()}.tmp.npz")
+            numpy.savez(temp_file, **data)
+            os.replace(temp_file, cache_file)
+        except OSError as e:
+            logger.warning("Couldn't write font cache {}: {}", cache_file, e)
+        return data
+
+    @staticmethod
+    def __rasterize(bdf_font) -> dict:
+        codepoints = sorted(bdf_font.glyphs)
+        glyphs = [bdf_font.glyphbycp(codepoint) for codepoint in codepoints]
+        # every glyph is drawn in the font's bounding box, so they're all the same size
+        masks = numpy.array([glyph.draw().todata(2) for glyph in glyphs], dtype=bool)
+        return {
+            "headers": numpy.array(json.dumps(bdf_font.headers)),
+            "props": numpy.array(json.dumps(bdf_font.props)),
+            "codepoints": numpy.array(codepoints, dtype=numpy.int32),
+            "advances": numpy.array([glyph.meta["dwx0"] for glyph in glyphs], dtype=numpy.int16),
+            "shape": numpy.array(masks.shape[1:], dtype=numpy.int32),
+            "masks": numpy.packbits(masks),
+            "default_char": numpy.array(0xFFFD),
+        }
+
+    def render_text(self, text: str) -> numpy.ndarray:
+        """
+        Rasterizes a line of text into a single boolean mask.
+
+        Each glyph is placed one advance width after the last, so glyphs may overlap each other (just like bdfparser).
+        :param text: The text to rasterize.
+        :return: A boolean mask that is the font's height tall, with True wherever a pixel is lit.
+        """
+        glyphs = [self.glyph(ord(char)) for char in text]
+        x = 0
+        positions = []
+        for _, advance in glyphs:
+            positions.append(x)
+            x += advance
+        width = max((x + mask.shape[1] for (mask, _), x in zip(glyphs, positions)), default=0)
+
+        strip = numpy.zeros((self.height, width), dtype=bool)
+        for (mask, _), x in zip(glyphs, positions):
+            strip[:, x : x + mask.shape[1]] |= mask
+        return strip
 
     @property
     def height(self):
@@ -492,8 +635,7 @@ def draw_centered_text(canvas: Canvas, font: Font, y: int, color: Color, text: s
     :param text: The text to draw on the canvas.
     :return: None.
     """
-    character_widths = [__actual_char_width(font, letter) for letter in text]
-    width = sum(character_widths)
+    _, width = text_strip(font, text)
     x = (canvas.width - width) // 2
     draw_text(canvas, font, x, y, color, text)
 
@@ -512,37 +654,29 @@ def draw_text(canvas: Canvas, font: Font, x: int, y: int, color: Color, text: st
     if len(text) == 0:
         return  # nothing to draw!
 
-    # Support multiple spacings based on device width
-    character_widths = [__actual_char_width(font, letter) for letter in text]
-    first_char_width = character_widths[0]
-    max_char_width = max(character_widths)
-    total_width = sum(character_widths)
-
-    # Offscreen to the left, adjust by first character width
-    if x < 0:
-        adjustment = abs(x + first_char_width) // first_char_width
-        text = text[adjustment:]
-        if adjustment:
-            x += first_char_width * adjustment
+    # the whole line is rasterized (and cached), and anything offscreen is clipped when it's drawn.
+    # this way scrolling text is only ever rasterized once, no matter where it is on the screen.
+    strip, total_width = text_strip(font, text)
+    font_y_offset = -(font.headers["fbby"] + font.headers["fbbyoff"])
+    canvas.set_mask(strip, color, x, y + font_y_offset)
 
-    # Offscreen to the right, rough adjustment by max width
-    if (total_width + x) > canvas.width:
-        text = text[: ((canvas.width + 1) // max_char_width) + 2]
-
-    # Draw the text!
-    if len(text) != 0:
-        # Ensure text doesn't get drawn as multiple lines
-        linelimit = len(text) * (font.headers["fbbx"] + 1)
+    return total_width
 
-        text_map = font.bdf_font.draw(text, linelimit, missing=font.default_char).todata(2)
-        font_y_offset = -(font.headers["fbby"] + font.headers["fbbyoff"])
 
-        for y2, row in enumerate(text_map):
-            for x2, value in enumerate(row):
-                if value == 1:
-                    canvas.set_pixel(x + x2, y + y2 + font_y_offset, color)
+@lru_cache(maxsize=256)
+def text_strip(font: Font, text: str) -> tuple[numpy.ndarray, int]:
+    """
+    Rasterizes a line of text, keeping the most recently used lines around so they don't have to be rasterized again.
 
-    return total_width
+    The strip is shared between callers, so it's read-only! Use text_strip.cache_info() to see the hit/miss counts.
+    :param font: The font to use for the text.
+    :param text: The text to rasterize.
+    :return: A tuple of the text's boolean mask (see Font.render_text) and its width in pixels.
+    """
+    strip = font.render_text(text)
+    strip.flags.writeable = False
+    width = sum(__actual_char_width(font, letter) for letter in text)
+    return strip, width
 
 
 def __actual_char_width(font: Font, char: str) -> int:
@@ -551,7 +685,7 @@ def __actual_char_width(font: Font, char: str) -> int:
     if width > 0:
         return width
 
-    return font.character_width(font.default_char.cp())
+    return font.character_width(font.default_char)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,95 @@
+from time import monotonic, sleep
+
+
+class FramePacer:
+    """
+    Keeps the main loop at a steady frame rate.
+
+    Every frame has an absolute deadline on the monotonic clock (the previous deadline plus one frame),
+    and wait() sleeps until it. Because the deadlines don't depend on how long a frame took, the
+    frame rate doesn't drift, and a slow frame doesn't push every frame after it back.
+
+    What happens after a late frame depends on the policy:
+
+    * DROP: the deadlines that were missed are skipped, and the next frame is due at the next deadline
+      still in the future. The frame rate stays steady, but fewer frames are drawn.
+    * CATCH_UP: the missed frames are run back to back, without sleeping, until the loop is back on
+      schedule. Tasks that advance one step per frame stay in sync with the clock. If the loop falls
+      more than max_catch_up frames behind, it gives up and starts over from now.
+    """
+
+    DROP = "drop"
+    CATCH_UP = "catch-up"
+    POLICIES = (DROP, CATCH_UP)
+
+    def __init__(self, fps: float = 24, policy: str = DROP, max_catch_up: int = 12):
+        """
+        :param fps: The target frame rate.
+        :param policy: What to do about late frames, DROP or CATCH_UP.
+        :param max_catch_up: With CATCH_UP, how many frames behind the loop may get before it resyncs.
+        """
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown late frame policy {policy!r}, expected one of {self.POLICIES}")
+        self.fps = fps
+        self.frame_time = 1 / fps
+        self.policy = policy
+        self.max_catch_up = max_catch_up
+
+        self.deadline = None
+        self.last_frame = None
+        # how late the current frame started, in seconds
+        self.lateness = 0.0
+        self.max_lateness = 0.0
+        self.frames = 0
+        self.late_frames = 0
+        # deadlines that were skipped (DROP), or given up on (CATCH_UP)
+        self.dropped_frames = 0
+
+    def wait(self) -> float:
+        """
+        Sleeps until the next frame is due.
+
+        :return: The time since the last frame started, in seconds (one frame's worth for the very first frame).
+        """
+        now = monotonic()
+        if self.deadline is None:
+            self.deadline = now
+        elif now < self.deadline:
+            sleep(self.deadline - now)
+            now = monotonic()
+
+        self.lateness = max(0.0, now - self.deadline)
+        self.max_lateness = max(self.max_lateness, self.lateness)
+        # less than a millisecond is just the OS waking us up a bit late
+        if self.lateness > 0.001:
+            self.late_frames += 1
+
+        missed = int(self.lateness / self.frame_time)
+        if self.policy == self.DROP or missed > self.max_catch_up:
+            self.dropped_frames += missed
+            self.deadline += (missed + 1) * self.frame_time
+        else:
+            self.deadline += self.frame_time
+
+        delta = self.frame_time if self.last_frame is None else now - self.last_frame
+        self.last_frame = now
+        self.frames += 1
+        return delta
+
+    def reset(self):
+        """
+        Forgets the schedule, so the next frame starts right away (say, after the loop was paused).
+        """
+        self.deadline = None
+        self.last_frame = None
+
+    def stats(self) -> dict:
+        return {
+            "fps": self.fps,
+            "policy": self.policy,
+            "frames": self.frames,
+            "late_frames": self.late_frames,
+            "dropped_frames": self.dropped_frames,
+            "lateness": self.lateness,
+            "max_lateness": self.max_lateness,
+        }
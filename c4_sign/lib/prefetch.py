@@ -0,0 +1,218 @@
+import os
+import queue
+import threading
+from time import perf_counter
+from typing import Union
+
+import numpy
+from loguru import logger
+
+
+class FramePrefetcher:
+    """
+    Reads frames ahead of the playhead on a background thread, so a slow SD card doesn't stall drawing.
+
+    The frames come from any sequence of arrays, such as the memory-mapped frames from
+    assets.video_to_frames. Up to `depth` frames are read ahead of the last one asked for
+    and kept in a bounded queue. If the frames are memory-mapped, the file is also
+    posix_fadvise'd (WILLNEED) further ahead, so the OS pulls it into the page cache
+    before the thread gets there.
+
+    Ask for frames with get(). Asking for anything but the next frame moves the playhead;
+    if a frame isn't ready yet (and the thread isn't just about done reading it), it's read
+    right away and counted as an underrun.
+    """
+
+    def __init__(self, frames, depth: int = 48, readahead: int = 240, wait: float = 0.005):
+        """
+        :param frames: The frames to read, anything that can be indexed and has a length.
+        :param depth: How many frames to keep ready.
+        :param readahead: How many frames ahead to ask the OS to read the file.
+        :param wait: How many seconds to wait for a frame the thread is in the middle of reading.
+        """
+        self.frames = frames
+        self.depth = depth
+        self.readahead = readahead
+        self.wait = wait
+        self._queue = queue.Queue(maxsize=depth)
+        self._condition = threading.Condition()
+        # the next frame the thread should read, or None when it should sit still
+        self._next_read = None
+        # bumped on every seek, so the thread knows to throw away what it was working on
+        self._generation = 0
+        self._position = None
+        self._running = True
+
+        self.frames_read = 0
+        # frames that weren't ready in time and had to be read on the spot
+        self.underruns = 0
+
+        self._file = None
+        self._advised_until = 0
+        filename = getattr(frames, "filename", None)
+        if filename is not None and hasattr(os, "posix_fadvise"):
+            try:
+                self._file = open(filename, "rb")
+            except OSError as e:
+                logger.warning("Not prefetching {} into the page cache: {}", filename, e)
+
+        self._thread = threading.Thread(target=self._run, name="FramePrefetcher", daemon=True)
+        self._thread.start()
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        The number of frames currently read ahead.
+        """
+        return self._queue.qsize()
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queue_depth,
+            "max_depth": self.depth,
+            "frames_read": self.frames_read,
+            "underruns": self.underruns,
+        }
+
+    def get(self, index: int) -> numpy.ndarray:
+        """
+        :param index: The frame to get.
+        :return: The frame. It's a copy, so it's safe to keep.
+        """
+        if index != self._position:
+            self.seek(index)
+        self._position = index + 1
+
+        frame = self._take(index)
+        if frame is None and self._next_read == index:
+            # the thread is reading it right now, which should be quicker than starting over on it here
+            frame = self._take(index, self.wait)
+        if frame is not None:
+            return frame
+
+        # the thread hasn't gotten here yet; read it now and let the thread skip ahead
+        self.underruns += 1
+        with self._condition:
+            if self._next_read is not None and self._next_read <= index:
+                self._next_read = index + 1
+        return numpy.array(self.frames[index])
+
+    def _take(self, index: int, timeout: float = 0) -> Union[numpy.ndarray, None]:
+        """
+        Takes frames off the queue until the one at index comes up.
+
+        :param timeout: How many seconds to wait for it, if the queue runs out.
+        :return: The frame, or None if it didn't come up in time.
+        """
+        deadline = perf_counter() + timeout
+        while True:
+            try:
+                generation, read_index, frame = self._queue.get(timeout=max(deadline - perf_counter(), 0))
+            except queue.Empty:
+                return None
+            # anything else is left over from before a seek or an underrun
+            if generation == self._generation and read_index == index:
+                return frame
+
+    def seek(self, index: int):
+        """
+        Starts reading ahead from a new frame, throwing away anything read so far.
+        """
+        with self._condition:
+            self._generation += 1
+            self._next_read = index
+            self._position = index
+            self._drain()
+            self._condition.notify()
+
+    def pause(self):
+        """
+        Stops reading ahead (and lets go of the frames read so far) until the next seek() or get().
+        """
+        with self._condition:
+            self._generation += 1
+            self._next_read = None
+            self._position = None
+            self._drain()
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._drain()
+            self._condition.notify()
+        self._thread.join()
+        if self._file is not None:
+            self._file.close()
+
+    def _drain(self):
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+    def _advise(self, index: int):
+        # hint the OS in big chunks, instead of one syscall per frame
+        if self._file is None or self._advised_until - index > self.readahead // 2:
+            return
+        start = max(index, self._advised_until)
+        end = min(len(self.frames), index + self.readahead)
+        if start >= end:
+            return
+        frame_size = self.frames[0].nbytes
+        try:
+            os.posix_fadvise(
+                self._file.fileno(),
+                self.frames.offset + start * frame_size,
+                (end - start) * frame_size,
+                os.POSIX_FADV_WILLNEED,
+            )
+        except OSError as e:
+            logger.warning("posix_fadvise failed, not prefetching into the page cache anymore: {}", e)
+            self._file.close()
+            self._file = None
+            return
+        self._advised_until = end
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and self._next_read is None:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                generation = self._generation
+                index = self._next_read
+                if index >= len(self.frames):
+                    # reached the end, wait for a seek
+                    self._next_read = None
+                    continue
+                if index < self._advised_until - self.readahead:
+                    # seeked backwards, start hinting from here again
+                    self._advised_until = index
+
+            self._advise(index)
+            try:
+                frame = numpy.array(self.frames[index])
+            except Exception as e:
+                logger.error("Caught exception while prefetching frame {}!", index)
+                logger.exception(e)
+                with self._condition:
+                    if generation == self._generation:
+                        self._next_read = None
+                continue
+
+            # wait for room, unless we've been told to do something else in the meantime
+            while True:
+                try:
+                    self._queue.put((generation, index, frame), timeout=0.1)
+                    break
+                except queue.Full:
+                    if not self._running or generation != self._generation:
+                        break
+
+            with self._condition:
+                if generation == self._generation:
+                    self.frames_read += 1
+                    if self._next_read == index:
+                        self._next_read = index + 1
@@ -1,11 +1,23 @@
 from abc import ABC, abstractmethod
+from datetime import timedelta
+from time import monotonic
+
+import numpy
 
 from c4_sign.lib.canvas import Canvas
 
 
 class ScreenBase(ABC):
-    def __init__(self):
+    def __init__(self, keep_alive_interval: timedelta = timedelta(seconds=1)):
+        """
+        :param keep_alive_interval: Frames that haven't changed aren't sent again, except this often
+            (just in case the display missed one).
+        """
+        self.keep_alive_interval = keep_alive_interval
         self.brightness = 100
+        self.skipped_frames = 0
+        self._last_frame = numpy.zeros((32, 32, 3), dtype=numpy.uint8)
+        self._last_sent = None
 
     @abstractmethod
     def update_lcd(self, text: str):
@@ -15,6 +27,25 @@ class ScreenBase(ABC):
     def update_display(self, canvas: Canvas):
         pass
 
+    def frame_changed(self, canvas: Canvas) -> bool:
+        """
+        Checks if a frame needs to be sent to the display, and remembers it as the last frame sent if so.
+
+        :param canvas: The frame that's about to be sent.
+        :return: False if the frame is the same as the last one and the keep alive interval hasn't passed yet.
+        """
+        now = monotonic()
+        if (
+            self._last_sent is not None
+            and now - self._last_sent < self.keep_alive_interval.total_seconds()
+            and numpy.array_equal(canvas.data, self._last_frame)
+        ):
+            self.skipped_frames += 1
+            return False
+        numpy.copyto(self._last_frame, canvas.data)
+        self._last_sent = now
+        return True
+
     def debug_info(self, **kwargs):
         pass
 
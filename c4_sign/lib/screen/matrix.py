@@ -1,4 +1,4 @@
-import threading
+from datetime import timedelta
 
 from loguru import logger
 
@@ -8,10 +8,12 @@ from c4_sign.lib.canvas import Canvas
 from c4_sign.lib.screen.base import ScreenBase
 from c4_sign.lib.screen.physical.driver import lcd
 from c4_sign.lib.screen.physical.neopixel import NeoPixel
+from c4_sign.lib.screen.physical.worker import DisplayWorker
 
 
 class MatrixScreen(ScreenBase):
-    def __init__(self):
+    def __init__(self, keep_alive_interval: timedelta = timedelta(seconds=1)):
+        super().__init__(keep_alive_interval)
         logger.info("Initializing Matrix Screen (Physical)")
         self.__pixels = NeoPixel(18, 32 * 32, brightness=0.05, auto_write=False)
         self.__lcd = lcd()
@@ -53,29 +55,29 @@ class MatrixScreen(ScreenBase):
         # 1024-long list of addresses
         logger.debug("Address table generated.")
 
-        self.__draw_thread = None
+        # the pixels are only ever touched by the worker's thread from here on out
+        self.__worker = DisplayWorker(self.__show, (1024, 3))
 
         # Finished table generation, now load screen...
         self.loading_screen()
 
     def update_display(self, canvas: Canvas):
+        if not self.frame_changed(canvas):
+            return
         logger.trace("Updating display...")
         # for i in range(32*32):
         #     self.__pixels[i] = canvas[i]
-        self.__pixels[:] = canvas.data.reshape((1024, 3))[self.__address_table]
-        if self.__draw_thread is not None:
-            logger.trace("Joining old draw thread...")
-            self.__draw_thread.join()
-        logger.trace("Starting new draw thread...")
-        self.__draw_thread = threading.Thread(target=self.__pixels.show)
-        self.__draw_thread.start()
-        # self.__pixels[:] = canvas.data.reshape((1024, 3))[self.__address_table]
-        # self.__pixels.show()
-
-    def update_display_thread(self, canvas):
-        # self.__pixels[:] = canvas.data.reshape((1024, 3))[self.__address_table]
+        self.__worker.submit(canvas.data.reshape((1024, 3))[self.__address_table])
+
+    def __show(self, frame):
+        # runs on the worker's thread
+        self.__pixels[:] = frame
         self.__pixels.show()
 
+    @property
+    def display_stats(self) -> dict:
+        return self.__worker.stats()
+
     def update_lcd(self, text):
         if text == self.__cached_text:
             return
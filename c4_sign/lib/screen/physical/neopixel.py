@@ -1,27 +1,73 @@
 from typing import Sequence, Union
 
+import numpy
 from loguru import logger
 
-from rpi_ws281x import PixelStrip, Color
 from threading import Lock
-from copy import deepcopy
+
+from c4_sign.lib.screen.physical.strip import packed_writer
 
 
 class NeoPixel:
-    def __init__(self, pin, num_pixels, brightness=1.0, auto_write=True):
+    def __init__(self, pin, num_pixels, brightness=1.0, auto_write=True, gamma=1.0, strip=None):
         logger.debug("Initializing NeoPixels")
         self.buf = bytearray(3 * num_pixels)
         self._nums = num_pixels
-        self.brightness = brightness
-        # brightness is 255 here because we apply it ourselves
-        # no need for double dimming
-        self.strip = PixelStrip(num_pixels, pin, 800000, 10, False, 255, 0)
+        # brightness and gamma are applied with a lookup table, which is rebuilt whenever either of them changes
+        self._brightness = brightness
+        self._gamma = gamma
+        self._lut = self._build_lut()
+        # a numpy (N, 3) view of buf, so whole frames can be written at once
+        self._pixels = numpy.frombuffer(self.buf, dtype=numpy.uint8).reshape(num_pixels, 3)
+        # the frame we actually transmit: each pixel is (blue, green, red, 0), which is 0x00RRGGBB as a uint32
+        self._bgrx = numpy.zeros((num_pixels, 4), dtype=numpy.uint8)
+        self._packed = self._bgrx.view("<u4").reshape(num_pixels)
+        if strip is None:
+            from rpi_ws281x import PixelStrip
+
+            # brightness is 255 here because we apply it ourselves
+            # no need for double dimming
+            strip = PixelStrip(num_pixels, pin, 800000, 10, False, 255, 0)
+        self.strip = strip
         self.strip.begin()
+        self._write_strip = packed_writer(self.strip)
         self.auto_write = auto_write
         self._lock = Lock()
 
-    def __setitem__(self, index: Union[int, slice], val: Union[tuple[int, int, int], Sequence[tuple[int, int, int]]]):
-        if isinstance(index, slice):
+    @property
+    def brightness(self):
+        return self._brightness
+
+    @brightness.setter
+    def brightness(self, brightness):
+        self._brightness = brightness
+        self._lut = self._build_lut()
+
+    @property
+    def gamma(self):
+        return self._gamma
+
+    @gamma.setter
+    def gamma(self, gamma):
+        self._gamma = gamma
+        self._lut = self._build_lut()
+
+    def _build_lut(self):
+        levels = numpy.arange(256, dtype=numpy.float64)
+        if self._gamma != 1.0:
+            levels = 255 * (levels / 255) ** self._gamma
+        # brightness above 1.0 was never applied, so we don't start now.
+        return (levels * min(self._brightness, 1.0)).astype(numpy.uint8)
+
+    def __setitem__(
+        self,
+        index: Union[int, slice],
+        val: Union[tuple[int, int, int], Sequence[tuple[int, int, int]], numpy.ndarray],
+    ):
+        if isinstance(index, slice) and isinstance(val, numpy.ndarray):
+            # (N, 3) arrays go straight into buf
+            self._pixels[index] = val
+        elif isinstance(index, slice):
             start, stop, step = index.indices(self._nums)
             for val_index, i in enumerate(range(start, stop, step)):
                 self._set_item(i, val[val_index])
@@ -56,20 +102,16 @@ class NeoPixel:
         return self.buf[offset + 1], self.buf[offset], self.buf[offset + 2]  # GRB -> RGB
 
     def show(self):
-        if self.brightness < 1.0:
+        with self._lock:
             logger.trace("Applying brightness")
-            # apply brightness
-            buf = bytearray(len(self.buf))
-            for i, val in enumerate(self.buf):
-                buf[i] = int(val * self.brightness)
-            self._transmit(buf)
-        else:
-            self._transmit(deepcopy(self.buf))
+            # apply brightness (and gamma) while flipping RGB to BGR, which packs the frame in the same step.
+            # this is a copy, so buf can be written to while we're transmitting
+            numpy.take(self._lut, self._pixels[:, ::-1], out=self._bgrx[:, :3], mode="clip")
+            self._transmit(self._packed)
 
-    def _transmit(self, buf):
-        with self._lock:
-            logger.trace("Transmitting to NeoPixels")
-            for i in range(len(buf) // 3):
-                self.strip[i] = Color(buf[i * 3], buf[i * 3 + 1], buf[i * 3 + 2])
-            self.strip.show()
-            logger.trace("Transmission complete!")
+    def _transmit(self, packed):
+        # only called from show, which holds the lock
+        logger.trace("Transmitting to NeoPixels")
+        self._write_strip(packed)
+        self.strip.show()
+        logger.trace("Transmission complete!")
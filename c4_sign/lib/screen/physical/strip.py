@@ -0,0 +1,91 @@
+import ctypes
+
+import numpy
+from loguru import logger
+
+
+class FakePixelStrip:
+    """
+    A stand-in for rpi_ws281x's PixelStrip that just remembers what it was sent.
+
+    Handy for testing and benchmarking the NeoPixel driver when you're not on the Pi:
+    NeoPixel(18, 32 * 32, strip=FakePixelStrip(32 * 32))
+    """
+
+    def __init__(self, num, pin=18, freq_hz=800000, dma=10, invert=False, brightness=255, channel=0):
+        self.leds = numpy.zeros(num, dtype=numpy.uint32)
+        self.last_shown = self.leds.copy()
+        self.show_count = 0
+
+    def begin(self):
+        pass
+
+    def numPixels(self):
+        return len(self.leds)
+
+    def __getitem__(self, pos):
+        return self.leds[pos]
+
+    def __setitem__(self, pos, value):
+        self.leds[pos] = value
+
+    def setPixelColor(self, n, color):
+        self.leds[n] = color
+
+    def getPixelColor(self, n):
+        return int(self.leds[n])
+
+    def set_packed(self, packed: numpy.ndarray):
+        self.leds[:] = packed
+
+    def show(self):
+        self.last_shown[:] = self.leds
+        self.show_count += 1
+
+
+def packed_writer(strip):
+    """
+    Gets a function that copies a whole frame of packed 0x00RRGGBB colors (a uint32 array) into a strip at once.
+
+    The strip must have been started with begin() already.
+    :param strip: A PixelStrip, or anything with a set_packed method (like FakePixelStrip).
+    :return: A function that takes the packed array.
+    """
+    if hasattr(strip, "set_packed"):
+        return strip.set_packed
+
+    try:
+        # the led buffer only exists once the strip has been started, and never moves after that
+        from rpi_ws281x import ws
+
+        address = int(ws.ws2811_channel_t_leds_get(strip._channel))
+    except Exception as e:
+        logger.warning("Can't write directly to the LED buffer, falling back to one LED at a time: {}", e)
+
+        def write_each(packed):
+            for i, color in enumerate(packed.tolist()):
+                strip[i] = color
+
+        return write_each
+
+    def write_buffer(packed):
+        packed = numpy.ascontiguousarray(packed, dtype=numpy.uint32)
+        ctypes.memmove(address, packed.ctypes.data, packed.nbytes)
+
+    return write_buffer
+
+
+if __name__ == "__main__":
+    from timeit import timeit
+
+    from c4_sign.lib.screen.physical.neopixel import NeoPixel
+
+    pixels = NeoPixel(18, 32 * 32, brightness=0.05, auto_write=False, strip=FakePixelStrip(32 * 32))
+    frame = numpy.random.randint(0, 256, (32 * 32, 3), dtype=numpy.uint8)
+
+    def update():
+        pixels[:] = frame
+        pixels.show()
+
+    frames = 1000
+    print(f"{timeit(update, number=frames) / frames * 1000:.3f} ms per frame")
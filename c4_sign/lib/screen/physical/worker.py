@@ -0,0 +1,81 @@
+import threading
+
+import numpy
+from loguru import logger
+
+
+class DisplayWorker:
+    """
+    Sends frames to a display from a single long-lived thread, so drawing the next frame overlaps sending this one.
+
+    Frames are double-buffered: submit() copies a frame into the back buffer, and the worker swaps it to the front
+    when it's ready to send it. The newest frame always wins; if a frame is submitted before the worker picked up the
+    previous one, the previous one is dropped.
+    """
+
+    def __init__(self, output, shape, dtype=numpy.uint8):
+        """
+        :param output: Called from the worker thread with each frame to send. Don't hold onto the array!
+        :param shape: The shape of a frame.
+        :param dtype: The dtype of a frame.
+        """
+        self._output = output
+        self._front = numpy.zeros(shape, dtype=dtype)
+        self._back = numpy.zeros(shape, dtype=dtype)
+        self._condition = threading.Condition()
+        self._pending = False
+        self._busy = False
+        self._running = True
+
+        self.frames_shown = 0
+        # submitted, but replaced by a newer frame before they were sent
+        self.dropped_frames = 0
+        # submitted while the previous frame was still being sent
+        self.late_frames = 0
+
+        self._thread = threading.Thread(target=self._run, name="DisplayWorker", daemon=True)
+        self._thread.start()
+
+    def submit(self, frame: numpy.ndarray):
+        with self._condition:
+            if self._pending:
+                self.dropped_frames += 1
+            elif self._busy:
+                self.late_frames += 1
+            numpy.copyto(self._back, frame)
+            self._pending = True
+            self._condition.notify()
+
+    def stats(self) -> dict:
+        return {
+            "frames_shown": self.frames_shown,
+            "dropped_frames": self.dropped_frames,
+            "late_frames": self.late_frames,
+        }
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and not self._pending:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                self._front, self._back = self._back, self._front
+                self._pending = False
+                self._busy = True
+
+            try:
+                self._output(self._front)
+            except Exception as e:
+                logger.error("Caught exception while sending frame to the display!")
+                logger.exception(e)
+
+            with self._condition:
+                self._busy = False
+                self.frames_shown += 1
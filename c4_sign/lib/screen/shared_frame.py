@@ -0,0 +1,77 @@
+import os
+from multiprocessing import shared_memory
+from time import sleep
+from typing import Optional
+
+import numpy
+
+
+class SharedFrame:
+    """
+    One frame in shared memory, written by one process and read by another.
+
+    The memory holds a sequence number followed by the pixels. The writer bumps the
+    sequence number to an odd number before writing a frame and to the next even
+    number after, so a reader knows to try again if it catches a frame half written
+    (a seqlock). Readers only ever see the newest frame: if the writer is faster, the
+    frames in between are simply overwritten, and nothing piles up.
+
+    Pass it to another process as an argument to multiprocessing.Process; only the
+    name of the memory is sent along, and the other process maps the same memory.
+    """
+
+    def __init__(self, shape=(32, 32, 3)):
+        self.shape = tuple(shape)
+        self._memory = shared_memory.SharedMemory(create=True, size=8 + int(numpy.prod(self.shape)))
+        # only the process that made the memory gets rid of it (a forked process has a copy of this object)
+        self._owner = os.getpid()
+        self._map()
+
+    def _map(self):
+        self._sequence = numpy.ndarray((1,), dtype=numpy.uint64, buffer=self._memory.buf)
+        self._pixels = numpy.ndarray(self.shape, dtype=numpy.uint8, buffer=self._memory.buf, offset=8)
+
+    def __getstate__(self):
+        return {"shape": self.shape, "memory": self._memory}
+
+    def __setstate__(self, state):
+        self.shape = state["shape"]
+        self._memory = state["memory"]
+        self._owner = None
+        self._map()
+
+    @property
+    def sequence(self) -> int:
+        return int(self._sequence[0])
+
+    def write(self, pixels: numpy.ndarray):
+        """
+        :param pixels: The frame, like Canvas.data.
+        """
+        self._sequence[0] += 1
+        numpy.copyto(self._pixels, pixels)
+        self._sequence[0] += 1
+
+    def read(self, last_sequence: Optional[int] = None) -> Optional[tuple]:
+        """
+        :param last_sequence: The sequence number of the last frame read, if any.
+        :return: The sequence number and raw bytes of the newest frame, or None if it's still the one at last_sequence.
+        """
+        while True:
+            before = self.sequence
+            if before == last_sequence:
+                return None
+            if before % 2:
+                # being written right now
+                sleep(0)
+                continue
+            pixels = self._pixels.tobytes()
+            if self.sequence == before:
+                return before, pixels
+
+    def close(self):
+        # the views have to go before the memory can be closed
+        del self._sequence, self._pixels
+        self._memory.close()
+        if self._owner == os.getpid():
+            self._memory.unlink()
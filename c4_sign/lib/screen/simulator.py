@@ -1,22 +1,27 @@
+import atexit
 import multiprocessing
-from time import sleep
+from datetime import timedelta
 
-import arrow
 from loguru import logger
 
 from c4_sign.lib.canvas import Canvas
 from c4_sign.lib.screen.base import ScreenBase
+from c4_sign.lib.screen.shared_frame import SharedFrame
 
 
 class SimulatorScreen(ScreenBase):
-    def __init__(self):
+    def __init__(self, keep_alive_interval: timedelta = timedelta(seconds=1)):
+        super().__init__(keep_alive_interval)
         from c4_sign.emulator.__main__ import start_server
+        # frames go through shared memory, where the server picks up the newest one whenever it's ready;
+        # the queues are just for the LCD, debug info, and overrides
+        self._frame = SharedFrame()
+        atexit.register(self._frame.close)
         self._to_web = multiprocessing.Queue()
         self._from_web = multiprocessing.Queue()
-        self._process = multiprocessing.Process(target=start_server, args=(self._to_web, self._from_web))
+        self._process = multiprocessing.Process(target=start_server, args=(self._to_web, self._from_web, self._frame))
         logger.info("Starting simulator server")
         self._process.start()
-        self._last_update = arrow.now()
         super().loading_screen()
 
     def update_lcd(self, text):
@@ -24,13 +29,9 @@ class SimulatorScreen(ScreenBase):
         self._to_web.put({"type": "lcd", "text": text})
 
     def update_display(self, canvas: Canvas):
-        logger.trace("Updating display")
-        self._to_web.put({"type": "display", "canvas": canvas.serialize()})
-        now = arrow.now()
-        # sleep so we fill a 1/24th of a second
-        logger.trace("Finished updating display, sleeping")
-        sleep(max(0, (1 / 24) - (now - self._last_update).total_seconds()))
-        self._last_update = arrow.now()
+        if self.frame_changed(canvas):
+            logger.trace("Updating display")
+            self._frame.write(canvas.data)
 
     def debug_info(self, **kwargs):
         logger.trace("Sending debug info: {}", kwargs)
@@ -0,0 +1,61 @@
+from bisect import bisect_left
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+import srt
+
+
+def lcd_text(content: str) -> str:
+    """
+    Pads (or cuts, with an ellipsis) a subtitle to exactly fill the 32 character LCD.
+    """
+    content = content.ljust(32)
+    if len(content) > 32:
+        # add ... to the end
+        content = content[:29] + "..."
+    return content
+
+
+class SubtitleTimeline:
+    """
+    Looks up which subtitle is showing at a given time, in O(log n).
+
+    All the start and end times are collected into one sorted list of boundaries, and the
+    answer for every boundary and for every gap between two boundaries is worked out up front,
+    already padded for the LCD. A lookup is then a single bisect.
+
+    A subtitle shows strictly between its start and end times. If subtitles overlap, the one
+    that comes first in the file wins.
+    """
+
+    def __init__(self, subtitles: Iterable[srt.Subtitle]):
+        entries = [(s.start.total_seconds(), s.end.total_seconds(), lcd_text(s.content)) for s in subtitles]
+        self._bounds = sorted({time for start, end, _ in entries for time in (start, end)})
+        # _at[i] is showing at exactly _bounds[i], _after[i] between _bounds[i] and _bounds[i + 1]
+        self._at = [None] * len(self._bounds)
+        self._after = [None] * len(self._bounds)
+        # go backwards, so that earlier subtitles overwrite later ones
+        for start, end, text in reversed(entries):
+            first = bisect_left(self._bounds, start)
+            last = bisect_left(self._bounds, end)
+            for i in range(first, last):
+                self._after[i] = text
+            for i in range(first + 1, last):
+                self._at[i] = text
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path]) -> "SubtitleTimeline":
+        with open(path) as f:
+            return cls(srt.parse(f.read()))
+
+    def text_at(self, seconds: float) -> Optional[str]:
+        """
+        :param seconds: The time into the video.
+        :return: The subtitle showing at that time, padded to 32 characters, or None.
+        """
+        i = bisect_left(self._bounds, seconds)
+        if i < len(self._bounds) and self._bounds[i] == seconds:
+            return self._at[i]
+        if i == 0:
+            return None
+        return self._after[i - 1]
@@ -0,0 +1,225 @@
+import json
+import tempfile
+from pathlib import Path
+from time import perf_counter
+from typing import Union
+
+import numpy
+from loguru import logger
+
+# A frame has 1/24th of a second to be drawn
+FRAME_BUDGET = 1 / 24
+# where the draw times go with --histograms, for c4_sign.histograms to chart
+HISTOGRAM_PATH = Path(tempfile.gettempdir()) / "c4_histograms"
+
+
+class TimeHistogram:
+    """
+    Counts durations in a fixed number of buckets, so it can record forever without growing.
+
+    The buckets are laid out like an HDR histogram: durations are counted in microseconds,
+    exactly up to 64 µs, and after that in buckets that double in width every power of two,
+    32 buckets per power. Every duration is off by at most ~3% (1/32), from a microsecond
+    up to half an hour, in under a thousand buckets.
+
+    Recording is a couple of integer operations, and percentiles can be asked for at any time.
+    """
+
+    SUB_BUCKET_BITS = 5
+    SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+    # anything longer than this is counted as this long
+    MAX_MICROSECONDS = (1 << 31) - 1
+    BUCKETS = (MAX_MICROSECONDS.bit_length() - SUB_BUCKET_BITS + 1) * SUB_BUCKETS
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        # a plain list, since bumping one number in it is a lot cheaper than in an array
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        # how many durations went over the frame budget
+        self.over_budget = 0
+
+    @classmethod
+    def _bucket(cls, microseconds: int) -> int:
+        if microseconds < 2 * cls.SUB_BUCKETS:
+            return microseconds
+        shift = microseconds.bit_length() - cls.SUB_BUCKET_BITS - 1
+        return shift * cls.SUB_BUCKETS + (microseconds >> shift)
+
+    @classmethod
+    def _bucket_bounds(cls, bucket: int) -> tuple:
+        """
+        :return: The lowest and highest durations (in µs) counted in the bucket.
+        """
+        if bucket < 2 * cls.SUB_BUCKETS:
+            return bucket, bucket
+        shift = bucket // cls.SUB_BUCKETS - 1
+        low = (bucket - shift * cls.SUB_BUCKETS) << shift
+        return low, low + (1 << shift) - 1
+
+    def record(self, seconds: float):
+        microseconds = min(max(int(seconds * 1_000_000), 0), self.MAX_MICROSECONDS)
+        self.counts[self._bucket(microseconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if seconds > FRAME_BUDGET:
+            self.over_budget += 1
+
+    def percentile(self, percent: float) -> float:
+        """
+        :param percent: Which percentile, from 0 to 100.
+        :return: The duration (in seconds) that percent of the recorded durations are at or under,
+            or 0 if nothing was recorded.
+        """
+        if self.count == 0:
+            return 0.0
+        rank = max(1, int(numpy.ceil(percent / 100 * self.count)))
+        bucket = int(numpy.searchsorted(numpy.cumsum(self.counts), rank))
+        # the top of the bucket, but never more than what was actually recorded
+        return min(self._bucket_bounds(bucket)[1] / 1_000_000, self.max)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self) -> dict:
+        """
+        :return: The count, mean, p50, p95, p99 and max, in seconds, and how many went over the frame budget.
+        """
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+            "over_budget": self.over_budget,
+        }
+
+    def samples(self) -> tuple:
+        """
+        :return: Two arrays: the middle of every bucket that has something in it (in seconds), and how many are in it.
+        """
+        buckets = [b for b, count in enumerate(self.counts) if count]
+        middles = numpy.array([sum(self._bucket_bounds(b)) / 2 for b in buckets]) / 1_000_000
+        return middles, numpy.array([self.counts[b] for b in buckets])
+
+    def to_dict(self) -> dict:
+        return {
+            "sub_bucket_bits": self.SUB_BUCKET_BITS,
+            "buckets": {b: count for b, count in enumerate(self.counts) if count},
+            "total": self.total,
+            "max": self.max,
+            "over_budget": self.over_budget,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TimeHistogram":
+        if data["sub_bucket_bits"] != cls.SUB_BUCKET_BITS:
+            raise ValueError(
+                f"Expected a histogram with {cls.SUB_BUCKET_BITS} sub bucket bits, got {data['sub_bucket_bits']}"
+            )
+        histogram = cls()
+        for bucket, count in data["buckets"].items():
+            histogram.counts[int(bucket)] = count
+        histogram.count = sum(histogram.counts)
+        histogram.total = data["total"]
+        histogram.max = data["max"]
+        histogram.over_budget = data["over_budget"]
+        return histogram
+
+
+def save_draw_times(path: Union[str, Path], title: str, artist: str, histogram: TimeHistogram):
+    """
+    Saves a task's draw times, to be turned into a chart later by c4_sign.histograms.
+    """
+    data = {"title": title, "artist": artist, "summary": histogram.summary(), "histogram": histogram.to_dict()}
+    Path(path).write_text(json.dumps(data))
+
+
+def load_draw_times(path: Union[str, Path]) -> tuple:
+    """
+    :return: The title, artist, and histogram saved by save_draw_times.
+    """
+    data = json.loads(Path(path).read_text())
+    return data["title"], data["artist"], TimeHistogram.from_dict(data["histogram"])
+
+
+class StageTimer:
+    """
+    Times each stage of a frame, to see where a slow frame spent its time.
+
+    Call start() at the start of a frame, and mark() at the end of every stage after it. Each stage
+    is timed from the end of the one before. end_frame() records the frame as a whole.
+
+    The times are gathered into one histogram per stage. Every `interval` seconds, the histograms
+    are summarized, logged, and started over, so the numbers always cover the last interval.
+    """
+
+    def __init__(self, interval: float = 60):
+        """
+        :param interval: How many seconds of frames to gather before summarizing (and logging) them.
+        """
+        self.interval = interval
+        self.stages = {}
+        # how long each stage took in the latest frame
+        self.latest = {}
+        self.frame = TimeHistogram()
+        # the summaries of the last full interval
+        self.last_summary = {}
+        self._frame_start = None
+        self._stage_start = None
+        self._interval_start = perf_counter()
+
+    def start(self):
+        self._frame_start = self._stage_start = perf_counter()
+
+    def mark(self, stage: str):
+        """
+        Records the time since the last stage (or the start of the frame) under stage.
+        """
+        now = perf_counter()
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = TimeHistogram()
+        self.latest[stage] = now - self._stage_start
+        histogram.record(self.latest[stage])
+        self._stage_start = now
+
+    def end_frame(self):
+        now = perf_counter()
+        self.frame.record(now - self._frame_start)
+        if now - self._interval_start >= self.interval:
+            self.roll()
+
+    def summary(self) -> dict:
+        """
+        :return: The summary of every stage (and of whole frames, under "frame") so far this interval.
+        """
+        summary = {stage: histogram.summary() for stage, histogram in self.stages.items()}
+        summary["frame"] = self.frame.summary()
+        return summary
+
+    def roll(self):
+        """
+        Logs the summary of this interval, keeps it in last_summary, and starts a new interval.
+        """
+        self.last_summary = self.summary()
+        self._interval_start = perf_counter()
+        for histogram in self.stages.values():
+            histogram.reset()
+        self.frame.reset()
+        logger.info(
+            "Frame times over {} frames (p50/p95/p99/max ms): {}",
+            self.last_summary["frame"]["count"],
+            ", ".join(
+                f"{stage} {s['p50'] * 1000:.2f}/{s['p95'] * 1000:.2f}/{s['p99'] * 1000:.2f}/{s['max'] * 1000:.2f}"
+                for stage, s in self.last_summary.items()
+            ),
+        )
@@ -0,0 +1,110 @@
+"""
+Renders screen tasks to animated previews, for the docs (--gif) and for pull requests.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Union
+
+import numpy
+from loguru import logger
+from PIL import Image, ImageDraw, ImageFont
+
+from c4_sign.base_task import OptimScreenTask, ScreenTask
+from c4_sign.lib.canvas import Canvas
+
+# how many pixels wide and tall each LED is in a preview
+SCALE = 8
+WIDTH = 32 * SCALE
+HEIGHT = 384
+MAX_DURATION = timedelta(seconds=30)
+
+
+@lru_cache(maxsize=64)
+def _lcd_image(text: str, font: ImageFont.FreeTypeFont) -> Image.Image:
+    # the LCD text hardly ever changes, so it's only drawn once per text
+    img = Image.new("RGB", (WIDTH, HEIGHT))
+    draw = ImageDraw.Draw(img)
+    draw.text((0, 320), text[16:], font=font, fill=(255, 255, 255))
+    draw.text((0, 300), text[:16], font=font, fill=(255, 255, 255))
+    return img
+
+
+def render_frame(data: numpy.ndarray, text: str, font: ImageFont.FreeTypeFont) -> Image.Image:
+    """
+    Draws one frame of a preview: the matrix, blown up, with the LCD text underneath.
+
+    :param data: The frame, like Canvas.data.
+    :param text: The 32 characters on the LCD.
+    """
+    img = _lcd_image(text, font).copy()
+    img.paste(Image.fromarray(data).resize((WIDTH, 32 * SCALE), Image.NEAREST))
+    return img
+
+
+def render_task(task_class: type[ScreenTask], output: Path, font_path: str) -> Path:
+    """
+    Runs a task until it's done (or for 30 seconds), and saves it as an animated .webp.
+
+    :return: The file the preview was saved to.
+    """
+    if issubclass(task_class, OptimScreenTask):
+        # draw it live, instead of rendering the whole frame cache first
+        task_class.should_optimize = False
+    font = ImageFont.truetype(font_path, 16)
+    delta_t = timedelta(seconds=1 / 24)
+    canvas = Canvas()
+    task = task_class()
+    task.prepare()
+    images = []
+    while True:
+        canvas.clear()
+        text = task.get_lcd_text()
+        result = task.draw(canvas, delta_t)
+        images.append(render_frame(canvas.data, text, font))
+        if result or delta_t * len(images) > MAX_DURATION:
+            break
+    path = output / f"{task_class.__name__}.webp"
+    images[0].save(
+        path,
+        save_all=True,
+        append_images=images[1:],
+        duration=(1 / 24) * 1000,
+        loop=0,
+    )
+    return path
+
+
+def render_previews(
+    task_classes: Iterable[type[ScreenTask]], output: Union[str, Path], font_path: str, workers: int = None
+) -> list[str]:
+    """
+    Renders the previews of several tasks at once, each in its own process.
+
+    :param output: The folder to save the previews in.
+    :param workers: How many tasks to render at once (by default, one per CPU).
+    :return: The names of the tasks that couldn't be rendered.
+    """
+    try:
+        from rich.progress import track
+    except ImportError:
+
+        def track(iter, description="", total=None):
+            yield from iter
+
+    output = Path(output)
+    output.mkdir(parents=True, exist_ok=True)
+    task_classes = list(task_classes)
+    failed = []
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = {pool.submit(render_task, task_class, output, font_path): task_class for task_class in task_classes}
+        for future in track(as_completed(futures), description="Converting!", total=len(futures)):
+            name = futures[future].__name__
+            if future.exception() is not None:
+                logger.opt(exception=future.exception()).error("Failed to render a preview of {}", name)
+                failed.append(name)
+            else:
+                logger.info("Saved {}", future.result())
+    return failed
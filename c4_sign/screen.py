@@ -1,31 +1,37 @@
 import traceback
+from datetime import timedelta
 
 import arrow
 from loguru import logger
 
 from c4_sign.consts import DEV_MODE
 from c4_sign.lib.canvas import Canvas
+from c4_sign.lib.pacer import FramePacer
+from c4_sign.lib.telemetry import StageTimer
 from c4_sign.loading_manager import LoadingManager
 from c4_sign.screen_tasks.error import ErrorScreenTask
 from c4_sign.ScreenManager import ScreenManager
 
 _screen = None
 _screen_manager = None
-_last_update = arrow.now()
+_pacer = FramePacer()
+_stage_timer = StageTimer()
 _canvas = Canvas()
 _low_fps_counter = 0
 
 
-def init_matrix(simulator, make_histograms):
-    global _screen, _screen_manager
+def init_matrix(simulator, make_histograms, fps=24, late_frames=FramePacer.DROP, keep_alive=1):
+    global _screen, _screen_manager, _pacer
+    _pacer = FramePacer(fps, late_frames)
+    keep_alive_interval = timedelta(seconds=keep_alive)
     if simulator:
         from c4_sign.lib.screen.simulator import SimulatorScreen
 
-        _screen = SimulatorScreen()
+        _screen = SimulatorScreen(keep_alive_interval)
     else:
         from c4_sign.lib.screen.matrix import MatrixScreen
 
-        _screen = MatrixScreen()
+        _screen = MatrixScreen(keep_alive_interval)
 
     _screen_manager = ScreenManager(make_histograms)
 
@@ -42,18 +48,22 @@ def screen_active():
 
 
 def update_screen():
-    global _screen, _canvas, _last_update, _screen_manager, _low_fps_counter
+    global _screen, _canvas, _pacer, _screen_manager, _low_fps_counter, _stage_timer
 
-    now = arrow.now()
-    delta_t = now - _last_update
-    _last_update = now
+    # every backend runs at the same pace; this sleeps until the next frame is due
+    delta_t = timedelta(seconds=_pacer.wait())
+    timer = _stage_timer
+    timer.start()
 
     text = _screen_manager.get_lcd_text()
+    timer.mark("lcd_text")
     _screen.update_lcd(text)
+    timer.mark("lcd")
 
     # clear canvas
     canvas = _canvas
     canvas.clear()
+    timer.mark("clear")
 
     # brightness
     if screen_active():
@@ -61,6 +71,8 @@ def update_screen():
     else:
         _screen.brightness = 0
         _screen.update_display(canvas)
+        timer.mark("display")
+        timer.end_frame()
         return  # don't draw anything!
 
     # draw stuff
@@ -70,21 +82,28 @@ def update_screen():
         logger.error("Caught exception while drawing screen!")
         logger.exception(e)
         _screen_manager.override_current_task(ErrorScreenTask(e))
+    timer.mark("draw")
 
     _screen.update_display(canvas)
+    timer.mark("display")
     fps = 1 / delta_t.total_seconds()
     if fps < 20:
         _low_fps_counter += 1
         if _low_fps_counter > 6: # .25 seconds 
-            logger.warning("Low FPS! {}", fps)
+            slowest = max(timer.latest, key=timer.latest.get)
+            logger.warning("Low FPS! {} (slowest: {} at {:.1f} ms)", fps, slowest, timer.latest[slowest] * 1000)
             _low_fps_counter = 0 # reset counter so we don't spam the logs
     else:
         _low_fps_counter = 0
     _screen.debug_info(
         fps=fps,
+        frame_lateness=_pacer.lateness,
+        late_frames=_pacer.late_frames,
+        dropped_frames=_pacer.dropped_frames,
+        stage_times=timer.last_summary,
         brightness=_screen.brightness,
         current_task=_screen_manager.current_task.__class__.__name__,
-        tasks=[t.__class__.__name__ for t in _screen_manager.tasks],
+        tasks=[t.name for t in _screen_manager.tasks],
         task_time_elapsed=(
             _screen_manager.current_task.elapsed_time.total_seconds() if _screen_manager.current_task else None
         ),
@@ -96,3 +115,12 @@ def update_screen():
         ),
     )
     _screen.debug_override(_screen_manager)
+    timer.mark("debug")
+    timer.end_frame()
+
+
+def stage_times() -> dict:
+    """
+    :return: How long each stage of update_screen has taken so far this interval (see StageTimer.summary).
+    """
+    return _stage_timer.summary()
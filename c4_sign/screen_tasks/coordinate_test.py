@@ -1,5 +1,7 @@
 from datetime import timedelta
 
+import numpy
+
 from c4_sign.base_task import ScreenTask
 from c4_sign.lib.canvas import Canvas
 
@@ -13,9 +15,9 @@ class CoordinateTest(ScreenTask):
         return super().prepare()
 
     def draw_frame(self, canvas: Canvas, delta_time: timedelta) -> bool:
-        for y in range(32):
-            for x in range(32):
-                canvas.set_pixel(x, y, (int(x / 32 * 255), int(y / 32 * 255), 0))
+        y, x = numpy.mgrid[0:32, 0:32]
+        colors = numpy.stack([(x / 32 * 255).astype(int), (y / 32 * 255).astype(int), numpy.zeros_like(x)], axis=-1)
+        canvas.set_mask(numpy.ones((32, 32), dtype=bool), colors)
 
         if self.elapsed_time > self.suggested_run_time:
             return True
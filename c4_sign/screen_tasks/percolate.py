@@ -1,4 +1,7 @@
 import random
+
+import numpy
+
 from c4_sign.base_task import ScreenTask
 from c4_sign.consts import COLOR_GRAY, COLOR_TEAL
 
@@ -45,10 +48,8 @@ class Percolate(ScreenTask):
         # check if the grid percolates
         # copy grid to canvas
         result = percolates(self.grid)
-        for x in range(32):
-            for y in range(32):
-                if self.grid[x][y] == 1:
-                    canvas.set_pixel(x, y, COLOR_GRAY)
-                elif self.grid[x][y] == 2:
-                    canvas.set_pixel(x, y, COLOR_TEAL)
+        # the grid is indexed [x][y], the canvas is indexed [y][x]
+        grid = numpy.array(self.grid).T
+        canvas.set_mask(grid == 1, COLOR_GRAY)
+        canvas.set_mask(grid == 2, COLOR_TEAL)
         return result
@@ -1,6 +1,7 @@
-import math
 from datetime import timedelta
 
+import numpy
+
 from c4_sign.base_task import OptimScreenTask
 from c4_sign.lib.canvas import Canvas
 
@@ -28,16 +29,16 @@ class RainbowWave(OptimScreenTask):
             0xFF00BF,
             0xFF0060,
         ]
+        self.palette = numpy.array([((c >> 16) & 0xFF, (c >> 8) & 0xFF, c & 0xFF) for c in self.epic_colors])
+        y, x = numpy.mgrid[0:32, 0:32]
+        self.distance = numpy.sqrt((15.5 - x) ** 2 + (15.5 - y) ** 2)
+        self.mask = numpy.ones((32, 32), dtype=bool)
         return super().prepare()
 
     def draw_frame(self, canvas: Canvas, delta_time: timedelta) -> bool:
 
-        for x in range(32):
-            for y in range(32):
-                color = self.epic_colors[
-                    (int(math.sqrt((15.5 - x) ** 2 + (15.5 - y) ** 2) - self.frame)) % len(self.epic_colors)
-                ]
-                canvas.set_pixel(x, y, color)
+        index = numpy.trunc(self.distance - self.frame).astype(int) % len(self.epic_colors)
+        canvas.set_mask(self.mask, self.palette[index])
         self.frame += 1
 
         if self.elapsed_time > self.suggested_run_time:
@@ -1,13 +1,10 @@
 import random
 from datetime import timedelta
 
-import numpy
-import srt
-from PIL import Image
-
 from c4_sign.base_task import ScreenTask
-from c4_sign.lib import graphics
-from c4_sign.lib.assets import file_from_google_drive, video_to_images
+from c4_sign.lib.assets import file_from_google_drive, video_to_frames
+from c4_sign.lib.prefetch import FramePrefetcher
+from c4_sign.lib.subtitles import SubtitleTimeline
 
 
 class RickRoll(ScreenTask):
@@ -20,37 +17,35 @@ class RickRoll(ScreenTask):
 
     def prepare_rick(self):
         # this'll take a bit...
-        # first, we need to load the video and split it into frames
-        # then we need to convert each frame into a 32x32 image
+        # first, we need to load the video and decode it
+        # then we need to shrink every frame down to 32x32
         # ...yeah. fortunately, we can cache this!
-        image_folder_path = video_to_images("https://www.youtube.com/watch?v=fH64whs5tzI")
-        self.image_folder_path = image_folder_path
-        subs = file_from_google_drive("rick.srt")
-        with subs.open() as f:
-            self.subtitles = list(srt.parse(f.read()))
+        self.frames = video_to_frames("https://www.youtube.com/watch?v=fH64whs5tzI")
+        self.prefetcher = FramePrefetcher(self.frames)
+        self.subtitles = SubtitleTimeline.from_file(file_from_google_drive("rick.srt"))
 
     def prepare(self):
         # weighted random choice, we want a 2% chance of the full video
         self.stop = False
         self.frame = 1
         super().prepare()
-        return random.random() < 0.02
+        if random.random() < 0.02:
+            self.prefetcher.seek(self.frame - 1)
+            return True
+        return False
+
+    def teardown(self, forced=False):
+        self.prefetcher.pause()
+        super().teardown(forced)
 
     def get_lcd_text(self) -> str:
-        current_time = self.frame * (1 / 24)
-        for subtitle in self.subtitles:
-            if subtitle.start.total_seconds() < current_time < subtitle.end.total_seconds():
-                content = subtitle.content.ljust(32)
-                if len(content) > 32:
-                    # add ... to the end
-                    content = content[:29] + "..."
-                return content
+        text = self.subtitles.text_at(self.frame * (1 / 24))
+        if text is not None:
+            return text
         return super().get_lcd_text()
 
     def draw_frame(self, canvas, delta_time):
-        # we need to load the image
-        image = Image.open(self.image_folder_path / f"{self.frame}.png")
-        graphics.draw_image(canvas, 0, 0, numpy.array(image))
+        canvas.data[:] = self.prefetcher.get(self.frame - 1)
         self.frame += 1
         if self.frame > 5088:
             self.frame = 1
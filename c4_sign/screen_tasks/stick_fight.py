@@ -1,10 +1,8 @@
 from c4_sign.base_task import ScreenTask
-from c4_sign.lib import graphics
-from c4_sign.lib.assets import video_to_images
+from c4_sign.lib.assets import video_to_frames
+from c4_sign.lib.prefetch import FramePrefetcher
 
 from datetime import timedelta
-from PIL import Image
-import numpy
 
 class StickFight(ScreenTask):
     title = "Stick Fight"
@@ -15,18 +13,22 @@ class StickFight(ScreenTask):
         self.prepare_stick_fight()
     
     def prepare_stick_fight(self):
-        image_folder_path = video_to_images("https://www.youtube.com/watch?v=p4F61wWMgLY")
-        self.image_folder_path = image_folder_path
+        self.frames = video_to_frames("https://www.youtube.com/watch?v=p4F61wWMgLY")
+        self.prefetcher = FramePrefetcher(self.frames)
         
     def prepare(self):
         self.stop = False
         self.frame = 1
+        self.prefetcher.seek(self.frame - 1)
         super().prepare()
         return True
+
+    def teardown(self, forced=False):
+        self.prefetcher.pause()
+        super().teardown(forced)
     
     def draw_frame(self, canvas, delta_time):
-        image = Image.open(self.image_folder_path / f"{self.frame}.png")
-        graphics.draw_image(canvas, 0, 0, numpy.array(image))
+        canvas.data[:] = self.prefetcher.get(self.frame - 1)
         self.frame += 1
         if self.frame > 1153:
             self.frame = 1